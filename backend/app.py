@@ -5,196 +5,373 @@ import logging
 import random
 import time
 import cv2
-import mediapipe as mp
 import numpy as np
 import threading
-from collections import deque
 import os
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlparse
+
+from broadcast import Broadcaster
+from calibration_store import CalibrationStore
+from capture import FrameGrabber
+from frame_skipper import InferenceScheduler
+from frame_sources import open_frame_source
+from feedback_engine import GOOD_ALIGNMENT_MESSAGE, score_poses
+from landmark_feed import LandmarkFeed
+from landmark_io import load_jsonl
+from metrics import metrics
+from pose_detector import create_pose_detector
+from pose_index import PoseIndex
+from pose_landmarks import PoseLandmarks
+from roi import RoiCropper
+from smoothing import LandmarkSmoother
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# MediaPipe pose setup
-mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(
-    static_image_mode=False,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-
 # Store client connections
 clients = set()
 
-# Calibration data storage - this will store calibration state for each pose
-calibration_data = {}
-
 # Session state for clients
 client_sessions = {}
 
-# Global variables for video processing
-frame_buffer = deque(maxlen=5)  # Store recent frames
-current_landmarks = {}  # Store current landmarks
+# Capture sources served by this process, keyed by source ID
+sources = {}
+
+# Persistent calibration poses keyed by (user, pose), loaded on start
+calibration_store = None
+
+# Nearest-neighbour index over all calibrated and reference poses, used to
+# recognize the pose being held; keyed like the calibration store
+pose_index = PoseIndex()
+
+# Optional reference library extracted with processimages.py
+REFERENCE_LIBRARY = os.getenv("ALIGNIFY_REFERENCE_LIBRARY", "landmarks.jsonl")
+REFERENCE_USER = "@library"
+
+# Sessions whose active pose is "auto" (or unset) get feedback against the
+# recognized pose once recognition is at least this confident
+recognition_min_confidence = 0.5
 processing_active = True
-video_capture = None
 
 # Feedback thresholds
 x_threshold = 0.1
 y_threshold = 0.1
 
-# Body parts mapping for feedback
-body_parts = {
-    'ARM': {
-        'RIGHT': ['LEFT_WRIST', 'LEFT_ELBOW', 'LEFT_SHOULDER'],
-        'LEFT': ['RIGHT_WRIST', 'RIGHT_ELBOW', 'RIGHT_SHOULDER']
-    },
-    'LEG': {
-        'RIGHT': ['LEFT_ANKLE', 'LEFT_KNEE', 'LEFT_HIP'],
-        'LEFT': ['RIGHT_ANKLE', 'RIGHT_KNEE', 'RIGHT_HIP']
-    }
-}
+# Minimum seconds between feedback messages per client (landmarks are
+# smoothed before scoring, so cues don't flip on jitter)
+feedback_interval = 1.0
 
-# Initialize video capture in a background thread
-def initialize_video_capture():
-    global video_capture
-    try:
-        video_capture = cv2.VideoCapture(0)
-        if not video_capture.isOpened():
-            logger.error("Error: Could not open video capture device")
-            return False
-        return True
-    except Exception as e:
-        logger.error(f"Error initializing video capture: {str(e)}")
-        return False
+# Capture sources, e.g. "mat1=0,mat2=1,demo=clips/warrior.mp4". Targets are
+# camera indices, stream URLs, video files, image directories or globs, or
+# shm://name?shape=HxW blocks (see frame_sources.open_frame_source).
+DEFAULT_SOURCES = "default=0"
 
-# Process video frames in a background thread
-def process_video_frames():
-    global current_landmarks, processing_active, video_capture
-    
-    logger.info("Starting video processing thread")
-    
-    while processing_active:
-        if video_capture is None or not video_capture.isOpened():
-            logger.warning("Video capture not available, attempting to initialize...")
-            if not initialize_video_capture():
-                logger.error("Failed to initialize video capture, retrying in 3 seconds...")
-                time.sleep(3)
-                continue
+def parse_sources(spec):
+    """Parse a source list like 'mat1=0,mat2=clips/mat2.mp4' into {id: target}."""
+    parsed = {}
+    entries = [entry.strip() for entry in spec.split(",") if entry.strip()]
+    for i, entry in enumerate(entries):
+        source_id, sep, target = entry.partition("=")
+        if not sep:
+            source_id, target = f"cam{i}", entry
+        target = target.strip()
+        parsed[source_id.strip()] = int(target) if target.isdigit() else target
+    return parsed
+
+# Serialize landmarks for WebSocket transmission
+def landmarks_payload(landmarks):
+    if landmarks is None:
+        return {}
+    return landmarks.to_dict(include_visibility=False)
+
+class PoseSource:
+    """One capture source with its own capture/inference pipeline, landmark stream and subscribers."""
+
+    def __init__(self, source_id, target):
+        self.source_id = source_id
+        self.target = target
+        self.pose_detector = create_pose_detector()
         
+        # Video processing state
+        self.video_capture = None
+        self.frame_buffer = None  # FrameGrabber holding recent frames in a ring buffer
+        self.current_landmarks = None  # Latest PoseLandmarks
+        self.landmark_seq = 0  # Sequence number of current_landmarks
+        self.landmark_feed = None  # Pushes new results to the asyncio loop
+        self.smoother = LandmarkSmoother()  # Temporal filter applied before feedback
+        self.scheduler = InferenceScheduler()  # Skips inference on still frames
+        self.roi = RoiCropper()  # Crops inference input to the tracked person
+        
+        # Clients subscribed to this source
+        self.clients = set()
+        # Fan-out of landmark updates: per-client bounded queues and concurrent sends
+        self.broadcaster = None
+        self.thread = None
+        self.update_task = None
+
+    # Initialize video capture in a background thread
+    def initialize_video_capture(self):
         try:
-            # Read a frame from the camera
-            success, frame = video_capture.read()
-            if not success:
-                logger.warning("Failed to read frame, retrying...")
+            # Recorded inputs play at their own frame rate and rewind at the end
+            self.video_capture = open_frame_source(self.target, loop=True)
+            if not self.video_capture.isOpened():
+                logger.error(f"Error: Could not open video capture for source {self.source_id} ({self.target})")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing video capture for source {self.source_id}: {str(e)}")
+            return False
+
+    def start(self, loop):
+        self.broadcaster = Broadcaster()
+        self.landmark_feed = LandmarkFeed(loop)
+        
+        # Start video processing thread
+        self.thread = threading.Thread(target=self.process_video_frames, daemon=True)
+        self.thread.start()
+        
+        # Create task for sending updates
+        self.update_task = asyncio.create_task(self.send_updates())
+
+    def release(self):
+        if self.video_capture is not None:
+            self.video_capture.release()
+
+    # Process video frames in a background thread
+    def process_video_frames(self):
+        logger.info(f"Starting video processing thread for source {self.source_id}")
+        last_frame = 0
+        inference_time = 0.0  # Moving average, for logging the achievable rate
+        
+        while processing_active:
+            if self.frame_buffer is None or not self.frame_buffer.alive:
+                if self.frame_buffer is not None:
+                    # The grabber stopped on repeated read failures (recorded
+                    # inputs loop instead of ending); reopen the source
+                    self.frame_buffer.stop()
+                    self.frame_buffer = None
+                    self.release()
+                    self.video_capture = None
+                if self.video_capture is None or not self.video_capture.isOpened():
+                    logger.warning(f"Video capture for source {self.source_id} not available, attempting to initialize...")
+                    if not self.initialize_video_capture():
+                        logger.error("Failed to initialize video capture, retrying in 3 seconds...")
+                        time.sleep(3)
+                        continue
+                # The grabber thread keeps the freshest camera frame in the ring buffer
+                self.frame_buffer = FrameGrabber(self.video_capture).start()
+                last_frame = 0
+            
+            try:
+                # Take the newest frame; blocks only until the camera delivers one,
+                # so inference runs as fast as min(camera rate, inference rate)
+                latest = self.frame_buffer.get_latest(last_frame, timeout=1.0)
+                if latest is None:
+                    logger.warning(f"No new frame from source {self.source_id}, waiting...")
+                    continue
+                frame_count, frame, captured_at = latest
+                metrics.count("frames_in")
+                if frame_count - last_frame > 1 and last_frame:
+                    logger.debug(f"Skipped {frame_count - last_frame - 1} stale frames")
+                    metrics.count("frames_dropped", frame_count - last_frame - 1)
+                last_frame = frame_count
+                
+                # No longer flipping the frame - displaying the raw camera output
+                # frame = cv2.flip(frame, 1)
+                
+                # Still scenes skip inference; their landmarks are extrapolated
+                # from the last two results
+                if not self.scheduler.should_infer(frame, captured_at):
+                    estimate = self.scheduler.estimate(captured_at)
+                    metrics.count("inference_skipped")
+                    if estimate is not None:
+                        self.publish_landmarks(estimate, captured_at)
+                    continue
+                
+                started = time.perf_counter()
+                
+                # Crop to the tracked person, downscale and convert to RGB for MediaPipe
+                with metrics.stage("convert"):
+                    frame_rgb = self.roi.crop(frame)
+                if self.roi.moved:
+                    # The tracker's region of interest is relative to the old crop
+                    self.pose_detector.reset()
+                
+                # Process the frame with MediaPipe Pose
+                with metrics.stage("inference"):
+                    results = self.pose_detector.process(frame_rgb)
+                
+                # Extract landmarks if detected, in full-frame coordinates
+                raw = None
+                if results.pose_landmarks:
+                    with metrics.stage("map_back"):
+                        raw = self.roi.map_back(PoseLandmarks.from_mediapipe(results.pose_landmarks).data)
+                    self.publish_landmarks(raw, captured_at)
+                else:
+                    self.roi.reset()
+                # If no landmarks detected, keep the last detected landmarks for a smoother experience
+                
+                elapsed = time.perf_counter() - started
+                self.scheduler.record(raw, captured_at, elapsed, frame)
+                inference_time = 0.9 * inference_time + 0.1 * elapsed
+                if frame_count % 300 == 0:
+                    logger.info(f"Source {self.source_id}: inference averaging {inference_time * 1000:.1f} ms per frame, "
+                                f"skipping up to {self.scheduler.skip} frames")
+                
+            except Exception as e:
+                logger.error(f"Error in video processing for source {self.source_id}: {str(e)}")
                 time.sleep(0.1)
+        
+        # Clean up resources when stopping
+        if self.frame_buffer is not None:
+            self.frame_buffer.stop()
+        self.release()
+        logger.info(f"Video processing thread for source {self.source_id} stopped")
+
+    # Smooth, update the landmarks and notify the event loop
+    def publish_landmarks(self, raw, captured_at):
+        with metrics.stage("smooth"):
+            self.current_landmarks = PoseLandmarks(
+                self.smoother.update(self.source_id, raw, captured_at)
+            )
+        metrics.count("frames_out")
+        self.landmark_seq += 1
+        self.landmark_feed.publish_threadsafe(self.landmark_seq, self.current_landmarks)
+
+    def subscribe(self, websocket):
+        self.clients.add(websocket)
+        self.broadcaster.add(websocket)
+
+    def unsubscribe(self, websocket):
+        self.clients.discard(websocket)
+        self.broadcaster.remove(websocket)
+
+    # Push each new pose result to this source's clients as soon as it is published
+    async def send_updates(self):
+        last_seq = 0
+        while True:
+            seq, landmarks = await self.landmark_feed.wait_next(last_seq)
+            last_seq = seq
+            if not self.clients:
                 continue
+            started = time.perf_counter()
+            shared = {"seq": seq, "landmarks": landmarks_payload(landmarks)}
+            payload_time = time.perf_counter() - started
+            started += payload_time
+            current_time = time.time()
             
-            # No longer flipping the frame - displaying the raw camera output
-            # frame = cv2.flip(frame, 1)
+            # Recognize the pose being held against the whole library
+            recognized_key = None
+            if landmarks is not None and len(pose_index):
+                label, confidence, key = pose_index.classify(landmarks)
+                shared["recognized_pose"] = {"name": label, "confidence": round(confidence, 3)}
+                if confidence >= recognition_min_confidence:
+                    recognized_key = key
             
-            # Add the frame to our buffer
-            frame_buffer.append(frame)
+            # Find clients due for feedback and the reference (user, pose) they need
+            feedback_due = {}
+            if landmarks is not None:
+                for client in self.clients:
+                    session_state = client_sessions.get(id(client), {})
+                    pose_name = session_state.get("active_pose")
+                    if pose_name in (None, "auto"):
+                        key = recognized_key
+                    else:
+                        key = (session_state.get("user"), pose_name)
+                    if (session_state.get("session_active", False)
+                            and key in pose_index.rows
+                            # Only send feedback occasionally to avoid spam
+                            and current_time - session_state.get("last_feedback_time", 0) > feedback_interval):
+                        feedback_due[client] = key
             
-            # Convert the frame to RGB for MediaPipe
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Score the current pose against every needed reference in one call
+            scores = None
+            pose_columns = {}
+            if feedback_due:
+                keys = sorted(set(feedback_due.values()))
+                pose_columns = {key: i for i, key in enumerate(keys)}
+                refs = np.stack([pose_index.reference(key) for key in keys])
+                scores = score_poses(landmarks, refs, x_threshold, y_threshold)
             
-            # Process the frame with MediaPipe Pose
-            results = pose_detector.process(frame_rgb)
+            # Per-client feedback is spliced onto the shared snapshot
+            extras = {}
+            for client, key in feedback_due.items():
+                column = pose_columns[key]
+                extras[client] = {
+                    "feedback": scores.message(0, column, GOOD_ALIGNMENT_MESSAGE),
+                    "accuracy": int(scores.accuracy[0, column])
+                }
+                session_state = client_sessions.get(id(client))
+                if session_state is not None:
+                    session_state["last_feedback_time"] = current_time
+            metrics.observe("feedback", time.perf_counter() - started)
             
-            # Extract landmarks if detected
-            if results.pose_landmarks:
-                # Convert landmarks to dictionary format for WebSocket transmission
-                landmarks_dict = {}
-                for i, landmark in enumerate(results.pose_landmarks.landmark):
-                    landmarks_dict[i] = {
-                        "x": landmark.x,
-                        "y": landmark.y,
-                        "z": landmark.z
-                    }
-                
-                # Update the global landmarks
-                current_landmarks = landmarks_dict
-            else:
-                # If no landmarks detected, keep the last detected landmarks for a smoother experience
-                pass
-                
-            # Add short delay to prevent CPU overuse
-            time.sleep(0.03)  # ~30 fps
-            
-        except Exception as e:
-            logger.error(f"Error in video processing: {str(e)}")
-            time.sleep(0.1)
-    
-    # Clean up resources when stopping
-    if video_capture is not None:
-        video_capture.release()
-    logger.info("Video processing thread stopped")
+            # Serialize the shared snapshot once for all clients
+            try:
+                started = time.perf_counter()
+                self.broadcaster.publish(json.dumps(shared), extras)
+                metrics.observe("serialize", payload_time + time.perf_counter() - started)
+            except Exception as e:
+                logger.error(f"Error sending update: {str(e)}")
 
 # Compare user landmarks with reference pose and generate feedback
 def get_direction_feedback(user_landmarks, ref_landmarks):
     """Compare user's pose with reference pose and return feedback."""
-    all_feedback = []
-    
-    # Convert numeric indices to MediaPipe pose landmark names
-    named_user_landmarks = {}
-    named_ref_landmarks = {}
-    
-    for index, values in user_landmarks.items():
-        if hasattr(mp_pose.PoseLandmark, str(index)):
-            name = mp_pose.PoseLandmark(int(index)).name
-            named_user_landmarks[name] = (values["x"], values["y"], values["z"])
-    
-    for index, values in ref_landmarks.items():
-        if hasattr(mp_pose.PoseLandmark, str(index)):
-            name = mp_pose.PoseLandmark(int(index)).name
-            named_ref_landmarks[name] = (values["x"], values["y"], values["z"])
-    
-    # Compare body parts
-    for limb_type, sides in body_parts.items():
-        for side, landmarks in sides.items():
-            if all(lm in named_user_landmarks for lm in landmarks) and all(lm in named_ref_landmarks for lm in landmarks):
-                user_x = np.mean([named_user_landmarks[lm][0] for lm in landmarks])
-                user_y = np.mean([named_user_landmarks[lm][1] for lm in landmarks])
-                ref_x = np.mean([named_ref_landmarks[lm][0] for lm in landmarks])
-                ref_y = np.mean([named_ref_landmarks[lm][1] for lm in landmarks])
-                
-                diff_x = user_x - ref_x
-                diff_y = user_y - ref_y
-                
-                description = f"{side.lower()} {limb_type.lower()}"
-                if abs(diff_x) > x_threshold:
-                    direction = "left" if diff_x < 0 else "right"
-                    all_feedback.append({
-                        'part': description,
-                        'message': f"Move your {description} {direction}",
-                        'diff': abs(diff_x)
-                    })
-                if abs(diff_y) > y_threshold:
-                    direction = "up" if diff_y > 0 else "down"
-                    all_feedback.append({
-                        'part': description,
-                        'message': f"Move your {description} {direction}",
-                        'diff': abs(diff_y)
-                    })
-    
-    if all_feedback:
-        all_feedback.sort(key=lambda x: x['diff'], reverse=True)
-        return all_feedback[0]['message']
-    return "Good alignment! Hold the pose"
+    scores = score_poses(user_landmarks, ref_landmarks, x_threshold, y_threshold)
+    return scores.message(default=GOOD_ALIGNMENT_MESSAGE)
+
+def query_param(path, name):
+    """Query parameter from the connection URL, e.g. ws://host:5000/ws?source=mat2&user=alex."""
+    query = parse_qs(urlparse(path or "").query)
+    return query.get(name, [None])[0]
+
+# Plain HTTP metrics on the WebSocket port: GET /metrics (Prometheus text)
+# or /metrics?format=json; anything else continues with the handshake
+async def serve_metrics(path, request_headers):
+    if urlparse(path).path != "/metrics":
+        return None
+    if query_param(path, "format") == "json":
+        return HTTPStatus.OK, [("Content-Type", "application/json")], metrics.json().encode()
+    return HTTPStatus.OK, [("Content-Type", "text/plain; version=0.0.4")], metrics.prometheus().encode()
+
+def client_send_lags():
+    lags = {}
+    for source in sources.values():
+        if source.broadcaster is not None:
+            lags.update(source.broadcaster.send_lags())
+    return lags
 
 # WebSocket handler
 async def ws_handler(websocket, path):
     # Add the client to our set and create session state
     client_id = id(websocket)
+    
+    # Subscribe the client to the requested capture source (default: the first one)
+    source_id = query_param(path, "source") or next(iter(sources))
+    if source_id not in sources:
+        await websocket.send(json.dumps({
+            "message": f"Unknown source: {source_id}",
+            "sources": list(sources)
+        }))
+        await websocket.close()
+        return
+    source = sources[source_id]
+    
     clients.add(websocket)
+    source.subscribe(websocket)
     client_sessions[client_id] = {
+        "source_id": source_id,
+        # Calibrations are stored per user; by default everyone on a mat shares one
+        "user": query_param(path, "user") or source_id,
         "active_pose": None,
         "calibrated_poses": set(),
         "session_active": False,
         "last_feedback_time": time.time()
     }
     
-    logger.info(f"New client connected. ID: {client_id}. Total clients: {len(clients)}")
+    logger.info(f"New client connected. ID: {client_id}, source: {source_id}. Total clients: {len(clients)}")
     
     try:
         async for message in websocket:
@@ -203,15 +380,50 @@ async def ws_handler(websocket, path):
                 action = data.get('action')
                 
                 logger.info(f"Received action: {action} from client {client_id}")
+                source = sources[client_sessions[client_id]["source_id"]]
                 
-                if action == 'calibrate':
+                if action == 'subscribe':
+                    # Switch this client to another capture source
+                    new_source_id = data.get('source')
+                    if new_source_id in sources:
+                        source.unsubscribe(websocket)
+                        source = sources[new_source_id]
+                        source.subscribe(websocket)
+                        client_sessions[client_id]["source_id"] = new_source_id
+                        await websocket.send(json.dumps({
+                            "message": f"Subscribed to source: {new_source_id}",
+                            "source": new_source_id,
+                            "landmarks": landmarks_payload(source.current_landmarks)
+                        }))
+                    else:
+                        await websocket.send(json.dumps({
+                            "message": f"Unknown source: {new_source_id}",
+                            "sources": list(sources)
+                        }))
+                
+                elif action == 'calibrate':
                     # Store calibration data for a pose
                     pose_name = data.get('pose')
                     logger.info(f"Calibrating pose: {pose_name} for client {client_id}")
                     
-                    # Use current landmarks for calibration
-                    if current_landmarks:
-                        calibration_data[pose_name] = current_landmarks
+                    # Use the source's current landmarks for calibration
+                    landmarks = source.current_landmarks
+                    if landmarks is not None:
+                        user = client_sessions[client_id]["user"]
+                        try:
+                            # File append; keep it off the event loop
+                            version = await asyncio.get_running_loop().run_in_executor(
+                                None, calibration_store.put, user, pose_name, landmarks)
+                        except (ValueError, OSError) as e:
+                            logger.warning(f"Could not save calibration {user}/{pose_name}: {e}")
+                            await websocket.send(json.dumps({
+                                "type": "calibration_error",
+                                "message": f"Failed to calibrate {pose_name}: {e}",
+                                "calibration_success": False
+                            }))
+                            continue
+                        pose_index.add((user, pose_name), pose_name, landmarks)
+                        logger.info(f"Saved calibration {user}/{pose_name} version {version}")
                         
                         # Mark this pose as calibrated for this client
                         client_sessions[client_id]["calibrated_poses"].add(pose_name)
@@ -221,7 +433,7 @@ async def ws_handler(websocket, path):
                         
                         await websocket.send(json.dumps({
                             "message": f"Calibrated pose: {pose_name}",
-                            "landmarks": current_landmarks,
+                            "landmarks": landmarks_payload(landmarks),
                             "calibration_success": True
                         }))
                     else:
@@ -244,7 +456,7 @@ async def ws_handler(websocket, path):
                     # Send confirmation
                     await websocket.send(json.dumps({
                         "message": f"Session started for pose: {pose_name}",
-                        "landmarks": current_landmarks,
+                        "landmarks": landmarks_payload(source.current_landmarks),
                         "feedback": f"Begin {pose_name}. Adjust your position to match the reference."
                     }))
                 
@@ -259,7 +471,7 @@ async def ws_handler(websocket, path):
                     # Send confirmation
                     await websocket.send(json.dumps({
                         "message": "Session ended",
-                        "landmarks": current_landmarks,
+                        "landmarks": landmarks_payload(source.current_landmarks),
                         "feedback": "Session complete. Great work!"
                     }))
                 
@@ -274,7 +486,7 @@ async def ws_handler(websocket, path):
                     # Send confirmation
                     await websocket.send(json.dumps({
                         "message": f"Changed to pose: {pose_name}",
-                        "landmarks": current_landmarks,
+                        "landmarks": landmarks_payload(source.current_landmarks),
                         "feedback": f"Transitioning to {pose_name}. Find your balance and alignment."
                     }))
                 
@@ -289,75 +501,33 @@ async def ws_handler(websocket, path):
         if websocket in clients:
             clients.remove(websocket)
         if client_id in client_sessions:
+            sources[client_sessions[client_id]["source_id"]].unsubscribe(websocket)
             del client_sessions[client_id]
         logger.info(f"Client {client_id} removed. Total clients: {len(clients)}")
 
-# Function to send periodic updates to all clients
-async def send_updates():
-    while True:
-        if clients:
-            for client in list(clients):
-                try:
-                    client_id = id(client)
-                    session_state = client_sessions.get(client_id, {})
-                    
-                    # Create response with current landmarks
-                    response = {"landmarks": current_landmarks}
-                    
-                    # Add feedback if in active session
-                    if session_state.get("session_active", False):
-                        pose_name = session_state.get("active_pose")
-                        
-                        # Generate feedback by comparing current pose with calibrated pose
-                        if pose_name in calibration_data and current_landmarks:
-                            # Only send feedback occasionally to avoid spam
-                            current_time = time.time()
-                            if current_time - session_state.get("last_feedback_time", 0) > 2.0:  # Every 2 seconds
-                                ref_landmarks = calibration_data.get(pose_name)
-                                if ref_landmarks:
-                                    feedback = get_direction_feedback(current_landmarks, ref_landmarks)
-                                    response["feedback"] = feedback
-                                    client_sessions[client_id]["last_feedback_time"] = current_time
-                                    
-                                    # Calculate a simple accuracy percentage
-                                    if len(current_landmarks) > 0 and len(ref_landmarks) > 0:
-                                        # Simple calculation based on key points
-                                        key_points = [11, 12, 13, 14, 23, 24, 25, 26, 27, 28]  # Shoulders, elbows, hips, knees, ankles
-                                        errors = []
-                                        
-                                        for point in key_points:
-                                            if str(point) in current_landmarks and str(point) in ref_landmarks:
-                                                curr = current_landmarks[str(point)]
-                                                ref = ref_landmarks[str(point)]
-                                                
-                                                # Calculate distance between current and reference
-                                                dx = curr["x"] - ref["x"]
-                                                dy = curr["y"] - ref["y"]
-                                                distance = (dx**2 + dy**2)**0.5
-                                                errors.append(distance)
-                                                
-                                        if errors:
-                                            avg_error = sum(errors) / len(errors)
-                                            # Convert to accuracy (0-100%)
-                                            accuracy = max(0, min(100, 100 * (1 - avg_error / 0.2)))  # Normalize error
-                                            response["accuracy"] = int(accuracy)
-                    
-                    await client.send(json.dumps(response))
-                        
-                except websockets.exceptions.ConnectionClosed:
-                    if client in clients:
-                        clients.remove(client)
-                    client_id = id(client)
-                    if client_id in client_sessions:
-                        del client_sessions[client_id]
-                    logger.info(f"Client removed during update. Total clients: {len(clients)}")
-                except Exception as e:
-                    logger.error(f"Error sending update: {str(e)}")
-        
-        await asyncio.sleep(0.1)  # Send updates 10 times per second
-
-# Check if calibration directory exists and load reference poses
+# Load saved calibrations and check for reference images
 def load_reference_images():
+    global calibration_store
+    started = time.perf_counter()
+    calibration_store = CalibrationStore()
+    logger.info(f"Loaded {len(calibration_store)} calibrated poses from {calibration_store.path} "
+                f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    # Index every calibrated pose, plus the extracted reference library if present
+    keys = list(calibration_store.index)
+    if keys:
+        rows = [calibration_store.index[key] for key in keys]
+        pose_index.add_many(keys, [pose for _, pose in keys], calibration_store.records["landmarks"][rows])
+    if os.path.exists(REFERENCE_LIBRARY):
+        library = [record for record in load_jsonl(REFERENCE_LIBRARY).values() if record["landmarks"]]
+        if library:
+            pose_index.add_many(
+                [(REFERENCE_USER, record["file"]) for record in library],
+                [os.path.splitext(os.path.basename(record["file"]))[0] for record in library],
+                np.array([record["landmarks"] for record in library], dtype=np.float32)
+            )
+    logger.info(f"Pose recognition index holds {len(pose_index)} poses")
+    
     if os.path.exists('calibration'):
         logger.info("Found calibration directory, checking for reference poses")
         for filename in os.listdir('calibration'):
@@ -368,25 +538,31 @@ def load_reference_images():
 async def main():
     global processing_active
     
-    # Initialize video capture
-    if not initialize_video_capture():
-        logger.error("Failed to initialize video capture, exiting")
+    # Set up the capture sources
+    for source_id, target in parse_sources(os.getenv("ALIGNIFY_SOURCES", DEFAULT_SOURCES)).items():
+        source = PoseSource(source_id, target)
+        if not source.initialize_video_capture():
+            logger.error(f"Failed to initialize video capture for source {source_id}, skipping")
+            continue
+        sources[source_id] = source
+    if not sources:
+        logger.error("No capture sources available, exiting")
         return
     
     # Check for reference images
     load_reference_images()
     
-    # Start video processing thread
-    video_thread = threading.Thread(target=process_video_frames)
-    video_thread.daemon = True
-    video_thread.start()
+    # Start a capture/inference pipeline per source
+    loop = asyncio.get_running_loop()
+    for source in sources.values():
+        source.start(loop)
+    logger.info(f"Serving sources: {', '.join(sources)}")
     
     try:
-        server = await websockets.serve(ws_handler, "127.0.0.1", 5000)
-        logger.info("WebSocket server started at ws://127.0.0.1:5000")
-        
-        # Create task for sending updates
-        update_task = asyncio.create_task(send_updates())
+        metrics.gauge("client_send_lag_seconds", client_send_lags)
+        server = await websockets.serve(ws_handler, "127.0.0.1", 5000, process_request=serve_metrics)
+        logger.info("WebSocket server started at ws://127.0.0.1:5000 (select a source with ?source=<id>)")
+        logger.info("Metrics available at http://127.0.0.1:5000/metrics")
         
         # Keep the server running
         await asyncio.Future()
@@ -395,8 +571,8 @@ async def main():
     finally:
         # Clean up resources
         processing_active = False
-        if video_capture is not None:
-            video_capture.release()
+        for source in sources.values():
+            source.release()
         logger.info("Resources cleaned up")
 
 if __name__ == "__main__":
@@ -406,5 +582,5 @@ if __name__ == "__main__":
         logger.info("Shutting down WebSocket server")
         # Ensure video processing is stopped
         processing_active = False
-        if video_capture is not None:
-            video_capture.release()
+        for source in sources.values():
+            source.release()
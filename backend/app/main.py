@@ -1,14 +1,27 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import mediapipe as mp
-import numpy as np
 import json
 import base64
 from typing import List, Dict
 import asyncio
+import os
+import sys
+import time
 from datetime import datetime
 
+# Shared backend modules live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calibration_store import CalibrationStore
+from frame_ingest import LatestFrameSlot
+from frame_protocol import FrameProtocolError
+from metrics import metrics
+from pose_detector import pose_settings
+from pose_landmarks import PoseLandmarks
+from pose_workers import PoseWorkerPool
+from smoothing import LandmarkSmoother
+
 app = FastAPI()
 
 # Enable CORS
@@ -20,19 +33,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MediaPipe setup
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+# MediaPipe runs in a pool of worker processes (size from POSE_WORKERS,
+# defaulting to the CPU count); created on startup so spawned workers
+# importing this module don't build pools of their own.
+pose_pool: PoseWorkerPool = None
 
-# Store calibration data
-calibration_data: Dict[str, dict] = {}
+# Persistent calibration poses keyed by (user, pose); memory-mapped on load
+calibration_store = CalibrationStore()
 active_sessions: Dict[str, dict] = {}
 
+# Temporal landmark filter; one stream per session
+smoother = LandmarkSmoother()
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
@@ -50,75 +62,176 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+@app.on_event("startup")
+async def start_pose_pool():
+    global pose_pool
+    # Resolving the settings may run the model auto-tune; keep it off the loop
+    settings = await asyncio.get_running_loop().run_in_executor(None, pose_settings)
+    pose_pool = PoseWorkerPool(settings=settings)
+
+@app.on_event("shutdown")
+async def stop_pose_pool():
+    if pose_pool is not None:
+        pose_pool.shutdown()
+
+def client_send_lags():
+    return {session_id: session.get("send_lag", 0.0) for session_id, session in active_sessions.items()}
+
+metrics.gauge("client_send_lag_seconds", client_send_lags)
+
 @app.get("/")
 async def root():
     return {"message": "Alignify Backend API"}
 
-@app.websocket("/ws/pose")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
-        while True:
-            data = await websocket.receive_text()
+@app.get("/metrics")
+async def get_metrics(format: str = "prometheus"):
+    """Stage timings, frame counters and per-client send lag for this process."""
+    if format == "json":
+        return metrics.snapshot()
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+def smooth(session_id, landmarks):
+    """Apply the session's temporal filter to a (33, 4) array, passing None through."""
+    if landmarks is None:
+        return None
+    with metrics.stage("smooth"):
+        return smoother.update(session_id, landmarks, time.monotonic())
+
+async def send_response(websocket: WebSocket, session_id: str, response: dict):
+    """Serialize and send a result, timing each step."""
+    with metrics.stage("serialize"):
+        text = json.dumps(response)
+    started = time.perf_counter()
+    await websocket.send_text(text)
+    lag = time.perf_counter() - started
+    metrics.observe("send", lag)
+    metrics.count("frames_out")
+    session = active_sessions.get(session_id)
+    if session is not None:
+        session["send_lag"] = lag
+
+def pose_response(landmarks):
+    """Build the pose response payload for a (33, 4) landmark array or None."""
+    if landmarks is not None:
+        return {
+            "type": "pose_data",
+            "landmarks": PoseLandmarks(landmarks).to_dict(),
+            "timestamp": datetime.now().isoformat()
+        }
+    return {
+        "type": "no_pose_detected",
+        "timestamp": datetime.now().isoformat()
+    }
+
+async def process_frames(websocket: WebSocket, session_id: str, slot: LatestFrameSlot):
+    """Run the newest pending frame for a session and send the result back."""
+    while True:
+        pending = await slot.get()
+        if pending is None:
+            return
+        (kind, data), age = pending
+
+        # Binary frames: fixed header + raw JPEG/WebP/RGB bytes
+        if kind == "bytes":
             try:
-                frame_data = json.loads(data)
-                if "image" in frame_data:
-                    # Decode base64 image
-                    img_data = base64.b64decode(frame_data["image"].split(",")[1])
-                    nparr = np.frombuffer(img_data, np.uint8)
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                    # Process frame with MediaPipe
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = pose.process(frame_rgb)
-
-                    if results.pose_landmarks:
-                        # Convert landmarks to dictionary
-                        landmarks = {
-                            str(idx): {
-                                "x": landmark.x,
-                                "y": landmark.y,
-                                "z": landmark.z,
-                                "visibility": landmark.visibility
-                            }
-                            for idx, landmark in enumerate(results.pose_landmarks.landmark)
-                        }
-
-                        # Send landmarks back to client
-                        await websocket.send_json({
-                            "type": "pose_data",
-                            "landmarks": landmarks,
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    else:
-                        await websocket.send_json({
-                            "type": "no_pose_detected",
-                            "timestamp": datetime.now().isoformat()
-                        })
-
-            except json.JSONDecodeError:
+                frame_id, client_timestamp, landmarks = await pose_pool.process_frame_message(
+                    session_id, data
+                )
+                response = pose_response(smooth(session_id, landmarks))
+                response["frame_id"] = frame_id
+                response["client_timestamp"] = client_timestamp
+                response["ingest"] = slot.stats(age)
+                await send_response(websocket, session_id, response)
+            except FrameProtocolError as e:
                 await websocket.send_json({
                     "type": "error",
-                    "message": "Invalid JSON data"
+                    "message": f"Invalid frame: {e}"
                 })
             except Exception as e:
                 await websocket.send_json({
                     "type": "error",
                     "message": str(e)
                 })
+            continue
+
+        # Legacy JSON frames with a base64 data URL
+        try:
+            frame_data = json.loads(data)
+            if "image" in frame_data:
+                # Decode base64 image; JPEG decoding happens in the worker
+                img_data = base64.b64decode(frame_data["image"].split(",")[1])
+                landmarks = await pose_pool.process_encoded_image(session_id, img_data)
+                response = pose_response(smooth(session_id, landmarks))
+                response["ingest"] = slot.stats(age)
+                await send_response(websocket, session_id, response)
+
+        except json.JSONDecodeError:
+            await websocket.send_json({
+                "type": "error",
+                "message": "Invalid JSON data"
+            })
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "message": str(e)
+            })
+
+@app.websocket("/ws/pose")
+async def websocket_endpoint(websocket: WebSocket):
+    await manager.connect(websocket)
+    # Pin this connection to its own tracker in the worker pool
+    session_id = pose_pool.open_session()
+    active_sessions[session_id] = {"connected_at": datetime.now().isoformat()}
+
+    # Receiving and processing run separately: frames that arrive while
+    # inference is busy replace each other, so only the newest one is run.
+    slot = LatestFrameSlot()
+    processor = asyncio.create_task(process_frames(websocket, session_id, slot))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes") is not None:
+                replaced = slot.put(("bytes", message["bytes"]))
+            elif message.get("text") is not None:
+                replaced = slot.put(("text", message["text"]))
+            else:
+                continue
+            metrics.count("frames_in")
+            if replaced:
+                metrics.count("frames_dropped")
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+    finally:
+        slot.close()
+        processor.cancel()
+        try:
+            await processor
+        except (asyncio.CancelledError, Exception):
+            pass
+        active_sessions.pop(session_id, None)
+        smoother.reset(session_id)
+        await pose_pool.close_session(session_id)
 
 @app.post("/calibration/{pose_name}")
-async def save_calibration(pose_name: str, landmarks: dict):
-    calibration_data[pose_name] = landmarks
-    return {"message": f"Calibration data saved for {pose_name}"}
+async def save_calibration(pose_name: str, landmarks: dict, user: str = "default"):
+    # File append; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    try:
+        version = await loop.run_in_executor(
+            None, calibration_store.put, user, pose_name, PoseLandmarks.from_dict(landmarks))
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"message": f"Calibration data saved for {pose_name}", "version": version}
 
 @app.get("/calibration/{pose_name}")
-async def get_calibration(pose_name: str):
-    if pose_name in calibration_data:
-        return calibration_data[pose_name]
+async def get_calibration(pose_name: str, user: str = "default"):
+    landmarks = calibration_store.get(user, pose_name)
+    if landmarks is not None:
+        return landmarks.to_dict()
     return {"error": "Calibration data not found"}
 
 if __name__ == "__main__":
@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from feedback_engine import GOOD_ALIGNMENT_MESSAGE, score_poses
+from frame_skipper import InferenceScheduler
+from frame_sources import VideoFileSource
+from landmark_io import collect_images
+from pose_detector import create_pose_detector, pose_settings
+from pose_index import PoseIndex
+from pose_landmarks import PoseLandmarks
+from roi import RoiCropper
+from smoothing import LandmarkSmoother
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+# Stages timed per frame, in pipeline order. "decode" decodes the encoded
+# frame like the FastAPI workers do; the rest match the app.py loop, where
+# "schedule" decides whether to infer and skipped frames get extrapolated
+# landmarks before smoothing.
+BENCHMARK_STAGES = ("decode", "schedule", "convert", "inference", "map_back", "smooth", "feedback", "serialize")
+
+# Recorded frames are replayed on a timeline at this rate, so the inference
+# scheduler sees the frame interval of a live camera
+REPLAY_FPS = 30.0
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_frames(inputs, max_video_frames=300):
+    """
+    Load benchmark inputs as encoded frames, kept in memory.
+
+    Images are used as stored; video clips are decoded once and each frame
+    re-encoded as JPEG, so every input goes through the same decode stage.
+
+    Returns:
+        list: (name, encoded bytes, True if the frame follows the previous
+        one in the same clip) per frame.
+    """
+    frames = []
+    videos = []
+    for item in inputs:
+        if os.path.isfile(item) and item.lower().endswith(VIDEO_EXTENSIONS):
+            videos.append(item)
+    for path in collect_images(inputs):
+        with open(path, "rb") as f:
+            frames.append((path, f.read(), False))
+    for path in videos:
+        capture = VideoFileSource(path, pacing="fast", loop=False)
+        count = 0
+        while count < max_video_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            if ok:
+                frames.append((f"{path}#{count}", encoded.tobytes(), count > 0))
+                count += 1
+        capture.release()
+    return frames
+
+
+class StageRecorder:
+    """Wall and CPU time per stage; RSS is sampled once per frame, outside the timed stages."""
+
+    def __init__(self, stages):
+        self.wall = {stage: [] for stage in stages}
+        self.cpu = {stage: 0.0 for stage in stages}
+        self.peak_rss = 0
+
+    def record(self, stage, wall_started, cpu_started):
+        self.wall[stage].append(time.perf_counter() - wall_started)
+        self.cpu[stage] += cpu_seconds() - cpu_started
+
+    def sample_rss(self):
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def summary(self, stage):
+        wall = np.asarray(self.wall[stage]) * 1000
+        if len(wall) == 0:
+            return None
+        total = wall.sum() / 1000
+        return {
+            "count": len(wall),
+            "mean_ms": round(float(wall.mean()), 3),
+            "p50_ms": round(float(np.percentile(wall, 50)), 3),
+            "p95_ms": round(float(np.percentile(wall, 95)), 3),
+            "p99_ms": round(float(np.percentile(wall, 99)), 3),
+            "cpu_percent": round(100 * self.cpu[stage] / total, 1) if total else 0.0,
+        }
+
+
+def run_benchmark(frames, total_frames, warmup=10, use_roi=True, use_skip=True):
+    """
+    Replay frames through the server pipeline and time every stage.
+
+    References for the feedback stage are the poses detected in the
+    inputs themselves, so scoring and recognition do real work. Clips run
+    through a tracking detector like the live pipeline, reset at the start
+    of each clip; unrelated still images use a static-image detector, since
+    tracking from one photo into the next measures nothing real.
+
+    Like PoseSource, the inference scheduler may skip still frames, which
+    then get extrapolated landmarks.
+    """
+    if not frames or total_frames < 1:
+        raise ValueError("The benchmark needs at least one input and one timed frame")
+    tracking = any(sequel for _, _, sequel in frames)
+    detector = create_pose_detector(static_image_mode=not tracking)
+    cropper = RoiCropper(enabled=use_roi)
+    smoother = LandmarkSmoother()
+    index = PoseIndex()
+
+    # Reference pass: one static detection per distinct input
+    with create_pose_detector(static_image_mode=True) as static_detector:
+        for name, data, _ in frames:
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            results = static_detector.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            if results.pose_landmarks:
+                index.add(name, os.path.basename(name), PoseLandmarks.from_mediapipe(results.pose_landmarks))
+
+    scheduler = InferenceScheduler(enabled=use_skip)
+    recorder = StageRecorder(BENCHMARK_STAGES)
+    frame_latencies = []
+    detected = 0
+    inferred = 0
+    started = None
+    cpu_started = None
+    for i in range(warmup + total_frames):
+        if i == warmup:
+            recorder = StageRecorder(BENCHMARK_STAGES)
+            started = time.perf_counter()
+            cpu_started = cpu_seconds()
+        timed = i >= warmup
+        _, data, sequel = frames[i % len(frames)]
+        timestamp = i / REPLAY_FPS
+        frame_started = time.perf_counter()
+        if not sequel:
+            # A new image or clip: nothing to track from the previous frame
+            cropper.reset()
+            smoother.reset("benchmark")
+            scheduler.reset()
+
+        t, c = time.perf_counter(), cpu_seconds()
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        recorder.record("decode", t, c)
+
+        t, c = time.perf_counter(), cpu_seconds()
+        infer = scheduler.should_infer(image, timestamp)
+        recorder.record("schedule", t, c)
+
+        raw = None
+        if infer:
+            inference_started = t = time.perf_counter()
+            c = cpu_seconds()
+            frame_rgb = cropper.crop(image)
+            recorder.record("convert", t, c)
+
+            t, c = time.perf_counter(), cpu_seconds()
+            if tracking and (cropper.moved or not sequel):
+                detector.reset()
+            results = detector.process(frame_rgb)
+            recorder.record("inference", t, c)
+
+            if results.pose_landmarks:
+                t, c = time.perf_counter(), cpu_seconds()
+                raw = cropper.map_back(PoseLandmarks.from_mediapipe(results.pose_landmarks).data)
+                recorder.record("map_back", t, c)
+            else:
+                cropper.reset()
+            scheduler.record(raw, timestamp, time.perf_counter() - inference_started, image)
+            inferred += timed
+        else:
+            raw = scheduler.estimate(timestamp)
+
+        payload = {"seq": i}
+        if raw is not None:
+            detected += timed
+            t, c = time.perf_counter(), cpu_seconds()
+            landmarks = PoseLandmarks(smoother.update("benchmark", raw, timestamp))
+            recorder.record("smooth", t, c)
+
+            t, c = time.perf_counter(), cpu_seconds()
+            if len(index):
+                label, confidence, key = index.classify(landmarks)
+                scores = score_poses(landmarks, index.reference(key))
+                payload["recognized_pose"] = {"name": label, "confidence": round(confidence, 3)}
+                payload["feedback"] = scores.message(default=GOOD_ALIGNMENT_MESSAGE)
+            recorder.record("feedback", t, c)
+
+            t, c = time.perf_counter(), cpu_seconds()
+            payload["landmarks"] = landmarks.to_dict(include_visibility=False)
+            json.dumps(payload)
+            recorder.record("serialize", t, c)
+
+        if timed:
+            frame_latencies.append(time.perf_counter() - frame_started)
+            # Outside the frame's timed span, so /proc reads don't inflate latency
+            recorder.sample_rss()
+
+    elapsed = time.perf_counter() - started
+    latencies = np.asarray(frame_latencies) * 1000
+    detector.close()
+    return {
+        "frames": total_frames,
+        "detected": detected,
+        "inferred": inferred,
+        "tracking": tracking,
+        "frame_skip": use_skip,
+        "fps": round(total_frames / elapsed, 2),
+        "cpu_percent": round(100 * (cpu_seconds() - cpu_started) / elapsed, 1),
+        "latency": {
+            "mean_ms": round(float(latencies.mean()), 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        },
+        "stages": {stage: recorder.summary(stage) for stage in BENCHMARK_STAGES if recorder.wall[stage]},
+        "peak_rss_mb": round(max(recorder.peak_rss, rss_bytes()) / 2 ** 20, 1),
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"\n{result['frames']} frames ({result['inferred']} inferred, {result['detected']} with a pose): "
+          f"{result['fps']} FPS, {result['cpu_percent']}% CPU, peak RSS {result['peak_rss_mb']} MB")
+    latency = result["latency"]
+    print(f"Frame latency: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms\n")
+    print(f"{'stage':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'CPU %':>7}")
+    for stage, summary in result["stages"].items():
+        line = (f"{stage:<10} {summary['count']:>6} {summary['p50_ms']:>9} {summary['p95_ms']:>9} "
+                f"{summary['p99_ms']:>9} {summary['cpu_percent']:>7}")
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous and previous["p50_ms"]:
+            change = 100 * (summary["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"]
+            line += f"   p50 {change:+.1f}% vs baseline"
+        print(line)
+    if baseline and baseline.get("fps"):
+        change = 100 * (result["fps"] - baseline["fps"]) / baseline["fps"]
+        print(f"\nFPS {change:+.1f}% vs baseline {baseline.get('commit') or ''} ({baseline['fps']} FPS)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless pose pipeline benchmark on recorded images and clips."
+    )
+    parser.add_argument("inputs", nargs="*", default=["calibration", "*.jpg"],
+                        help="Images, video files, directories or glob patterns (default: calibration/ and *.jpg)")
+    parser.add_argument("-n", "--frames", type=int, default=300,
+                        help="Frames to time; inputs are replayed in a loop")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed frames before measuring")
+    parser.add_argument("--max-video-frames", type=int, default=300,
+                        help="Frames to load from each video file")
+    parser.add_argument("--no-roi", action="store_true", help="Feed full frames instead of person crops")
+    parser.add_argument("--no-skip", action="store_true", help="Run inference on every frame")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="JSON results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+    if args.warmup < 0:
+        parser.error("--warmup can't be negative")
+
+    frames = load_frames(args.inputs, args.max_video_frames)
+    if not frames:
+        print("No benchmark inputs found.")
+        return 1
+    print(f"Loaded {len(frames)} frames; timing {args.frames} after {args.warmup} warm-up frames...")
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "inputs": len(frames),
+        "roi": not args.no_roi,
+        "pose_settings": pose_settings(),
+    }
+    result.update(run_benchmark(frames, args.frames, args.warmup, use_roi=not args.no_roi,
+                                use_skip=not args.no_skip))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults saved to '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import time
+
+import websockets
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def splice_update(shared_json, extra=None):
+    """
+    Add per-client fields to an already-serialized shared update object.
+
+    The shared part (landmarks, sequence number, ...) is serialized once
+    per result; only the small per-client part (feedback, accuracy) is
+    encoded here and spliced in before the closing brace.
+    """
+    if not extra:
+        return shared_json
+    return shared_json[:-1] + ', ' + json.dumps(extra)[1:]
+
+
+class ClientChannel:
+    """Bounded outbound queue plus a sender task for one client."""
+
+    def __init__(self, websocket, max_queue, send_timeout):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.timeouts = 0
+        self.last_send_lag = 0.0
+        self.task = asyncio.create_task(self._sender())
+
+    def offer(self, message):
+        """Queue a message, dropping the oldest one if the client is behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            metrics.count("messages_dropped")
+        self.queue.put_nowait((message, time.monotonic()))
+
+    async def _sender(self):
+        while True:
+            message, queued_at = await self.queue.get()
+            try:
+                started = time.perf_counter()
+                await asyncio.wait_for(self.websocket.send(message), self.send_timeout)
+                metrics.observe("send", time.perf_counter() - started)
+                metrics.count("messages_sent")
+                self.last_send_lag = time.monotonic() - queued_at
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                metrics.count("send_timeouts")
+                logger.warning(f"Send to client {id(self.websocket)} timed out after {self.send_timeout}s")
+            except websockets.exceptions.ConnectionClosed:
+                return
+            except Exception as e:
+                logger.error(f"Error sending update: {str(e)}")
+
+    def close(self):
+        self.task.cancel()
+
+
+class Broadcaster:
+    """
+    Fan-out of landmark updates to many clients.
+
+    Each client gets its own bounded queue and sender task, so sends run
+    concurrently and a slow socket only delays (and drops) its own updates.
+    """
+
+    def __init__(self, max_queue=2, send_timeout=1.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.channels = {}
+
+    def add(self, websocket):
+        self.channels[websocket] = ClientChannel(websocket, self.max_queue, self.send_timeout)
+
+    def remove(self, websocket):
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.close()
+
+    def send_lags(self):
+        """Queue-to-socket lag of each client's most recent send, keyed by client id."""
+        return {id(websocket): channel.last_send_lag for websocket, channel in self.channels.items()}
+
+    def publish(self, shared_json, extras=None):
+        """
+        Queue one update per client.
+
+        Args:
+            shared_json (str): JSON object sent to every client, serialized once by the caller.
+            extras (dict): Optional per-client extra fields keyed by websocket.
+        """
+        for websocket, channel in list(self.channels.items()):
+            if channel.task.done():
+                # Sender stopped because the connection closed
+                self.remove(websocket)
+                continue
+            extra = extras.get(websocket) if extras else None
+            channel.offer(splice_update(shared_json, extra))
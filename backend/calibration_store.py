@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from pose_landmarks import LANDMARK_SHAPE, PoseLandmarks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv(
+    "ALIGNIFY_CALIBRATION_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration_store.bin")
+)
+
+# File layout: a 16-byte header followed by fixed-size records. Records are
+# only ever appended; recalibrating a pose appends a new version.
+STORE_MAGIC = b"ALGNCAL1"
+STORE_FORMAT_VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("format", "<u4"), ("reserved", "<u4")])
+
+RECORD_DTYPE = np.dtype([
+    ("user", "S32"),
+    ("pose", "S32"),
+    ("version", "<u4"),
+    ("flags", "<u4"),
+    ("created", "<f8"),
+    ("landmarks", "<f4", LANDMARK_SHAPE),
+])
+
+
+class CalibrationStore:
+    """
+    Persistent calibration poses keyed by (user, pose), with versioning.
+
+    The record file is memory-mapped on open, so reloading thousands of
+    reference poses costs one mmap plus building the in-memory index;
+    landmarks returned by get() are views into the mapping.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        self._count = 0  # Records in the file; the mapping may lag behind after put()
+        self.index = {}  # (user, pose) -> row of the latest version
+        self.versions = {}  # (user, pose) -> latest version number
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        header = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != STORE_MAGIC:
+            raise ValueError(f"{self.path} is not a calibration store")
+        if header["format"][0] != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported calibration store format {header['format'][0]}")
+
+        size = os.path.getsize(self.path)
+        self._count = (size - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+        expected = HEADER_DTYPE.itemsize + self._count * RECORD_DTYPE.itemsize
+        if size != expected:
+            # A write was cut off; drop the partial record so appends stay aligned
+            logger.warning(f"Dropping {size - expected} bytes of a torn record at the end of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(expected)
+        self._remap()
+
+        # Later rows are newer versions, so the last row per key wins
+        index = {}
+        versions = {}
+        for row, (user, pose, version) in enumerate(zip(self._records["user"].tolist(),
+                                                        self._records["pose"].tolist(),
+                                                        self._records["version"].tolist())):
+            key = (user.decode(), pose.decode())
+            index[key] = row
+            versions[key] = version
+        self.index = index
+        self.versions = versions
+
+    def _remap(self):
+        if self._count:
+            self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                                      offset=HEADER_DTYPE.itemsize, shape=(self._count,))
+
+    @property
+    def records(self):
+        """All records as a read-only mapping of the file, re-mapped only after appends."""
+        with self._lock:
+            if len(self._records) != self._count:
+                self._remap()
+            return self._records
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, user, pose):
+        """Latest calibrated PoseLandmarks for (user, pose), or None."""
+        row = self.index.get((user, pose))
+        if row is None:
+            return None
+        return PoseLandmarks(self.records["landmarks"][row])
+
+    def get_version(self, user, pose):
+        return self.versions.get((user, pose), 0)
+
+    def poses(self, user):
+        """All latest calibrated poses for a user as {pose: PoseLandmarks}."""
+        # Rows first: records then maps at least every row they refer to
+        rows = [(pose, row) for (owner, pose), row in list(self.index.items()) if owner == user]
+        landmarks = self.records["landmarks"]
+        return {pose: PoseLandmarks(landmarks[row]) for pose, row in rows}
+
+    def put(self, user, pose, landmarks):
+        """Append a new calibration version for (user, pose) and return its version number."""
+        data = getattr(landmarks, "data", landmarks)
+        if not user or not pose:
+            raise ValueError("Calibration user and pose names are required")
+        if len(user.encode()) > 32 or len(pose.encode()) > 32:
+            raise ValueError("Calibration user and pose names are limited to 32 bytes")
+        with self._lock:
+            record = np.zeros(1, dtype=RECORD_DTYPE)
+            record["user"] = user.encode()
+            record["pose"] = pose.encode()
+            record["version"] = self.get_version(user, pose) + 1
+            record["created"] = time.time()
+            record["landmarks"] = np.asarray(data, dtype=np.float32).reshape(LANDMARK_SHAPE)
+
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "ab") as f:
+                if new_file:
+                    header = np.zeros(1, dtype=HEADER_DTYPE)
+                    header["magic"] = STORE_MAGIC
+                    header["format"] = STORE_FORMAT_VERSION
+                    f.write(header.tobytes())
+                f.write(record.tobytes())
+            # Index just the new row; the file is re-mapped on the next read
+            key = (user, pose)
+            self.index[key] = self._count
+            self.versions[key] = int(record["version"][0])
+            self._count += 1
+            return self.versions[key]
+
+    def import_json(self, path, user):
+        """Import a legacy name-keyed landmarks.json file ({pose: {NAME: [x, y, z]}})."""
+        with open(path) as f:
+            legacy = json.load(f)
+        imported = 0
+        for pose, landmarks in legacy.items():
+            if (user, pose) not in self.index:
+                self.put(user, pose, PoseLandmarks.from_named(landmarks))
+                imported += 1
+        logger.info(f"Imported {imported} calibration poses from {path}")
+        return imported
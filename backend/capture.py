@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class FrameGrabber:
+    """
+    Reads camera frames on a dedicated thread into a preallocated ring buffer.
+
+    The grabber drains the camera as fast as it delivers frames so the
+    driver queue never holds stale frames. Consumers call get_latest() to
+    get the newest frame; the slot handed out stays reserved until the next
+    call, so the grabber never overwrites a frame while inference reads it.
+    """
+
+    def __init__(self, capture, slots=5, max_failures=30):
+        if slots < 3:
+            raise ValueError("FrameGrabber needs at least 3 ring buffer slots")
+        self.capture = capture
+        self.slots = slots
+        self.max_failures = max_failures
+        self.buffer = None  # (slots, h, w, 3), allocated from the first frame
+        self.timestamps = np.zeros(slots, dtype=np.float64)
+        self.frame_count = 0
+        self.failed = False
+        self._latest_slot = -1
+        self._held_slot = -1
+        self._running = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _next_slot(self):
+        slot = (self._latest_slot + 1) % self.slots
+        if slot == self._held_slot:
+            slot = (slot + 1) % self.slots
+        return slot
+
+    def _allocate(self, frame):
+        self.buffer = np.empty((self.slots,) + frame.shape, dtype=frame.dtype)
+        logger.info(f"Allocated {self.slots}-slot frame ring buffer for {frame.shape[1]}x{frame.shape[0]} frames")
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            waited = time.perf_counter()
+            if not self.capture.grab():
+                failures += 1
+                if failures >= self.max_failures:
+                    logger.error("Frame grabber giving up after repeated read failures")
+                    break
+                time.sleep(0.01)
+                continue
+
+            started = time.perf_counter()
+            metrics.observe("capture_wait", started - waited)
+            with self._cond:
+                slot = self._next_slot()
+            if self.buffer is None:
+                ok, frame = self.capture.retrieve()
+                if ok:
+                    self._allocate(frame)
+                    self.buffer[slot] = frame
+            else:
+                # Decode straight into the reserved slot, no reallocation
+                ok, _ = self.capture.retrieve(self.buffer[slot])
+            if not ok:
+                failures += 1
+                continue
+            failures = 0
+            metrics.observe("capture", time.perf_counter() - started)
+
+            with self._cond:
+                self.timestamps[slot] = time.monotonic()
+                self._latest_slot = slot
+                self.frame_count += 1
+                self._cond.notify_all()
+
+        self.failed = self._running
+        with self._cond:
+            self._cond.notify_all()
+
+    def get_latest(self, last_count=0, timeout=1.0):
+        """
+        Wait for a frame newer than last_count and reserve its slot.
+
+        Returns:
+            tuple: (frame_count, frame view, capture timestamp), or None on
+            timeout or when the grabber has stopped.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.frame_count <= last_count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.alive:
+                    return None
+                self._cond.wait(remaining)
+            slot = self._latest_slot
+            self._held_slot = slot
+            return self.frame_count, self.buffer[slot], self.timestamps[slot]
@@ -0,0 +1,133 @@
+import numpy as np
+
+from pose_landmarks import (
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST,
+    RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE,
+    RIGHT_ANKLE
+)
+
+# Feedback thresholds (normalized image coordinates)
+X_THRESHOLD = 0.1
+Y_THRESHOLD = 0.1
+
+# Limbs compared for feedback. Sides are named from the user's point of
+# view on the mirrored display, so MediaPipe's LEFT_* joints are the
+# user's "right" limb.
+LIMBS = (
+    ("right arm", (LEFT_WRIST, LEFT_ELBOW, LEFT_SHOULDER)),
+    ("left arm", (RIGHT_WRIST, RIGHT_ELBOW, RIGHT_SHOULDER)),
+    ("right leg", (LEFT_ANKLE, LEFT_KNEE, LEFT_HIP)),
+    ("left leg", (RIGHT_ANKLE, RIGHT_KNEE, RIGHT_HIP)),
+)
+LIMB_NAMES = tuple(name for name, _ in LIMBS)
+LIMB_INDEX = np.array([indices for _, indices in LIMBS], dtype=np.intp)  # (L, 3)
+
+# Shoulders, elbows, hips, knees, ankles used for the accuracy score
+ACCURACY_KEY_POINTS = np.array([
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_HIP,
+    RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE
+], dtype=np.intp)
+# Mean key-point error that maps to 0% accuracy
+ACCURACY_ERROR_SCALE = 0.2
+
+GOOD_ALIGNMENT_MESSAGE = "Good alignment! Hold the pose"
+
+# Cue table indexed by [limb, axis, delta > 0]. For x a negative delta
+# means "move left"; for y a positive delta (lower on screen) means "up".
+_DIRECTIONS = (("left", "right"), ("down", "up"))
+CUE_MESSAGES = np.array([
+    [[f"Move your {name} {direction}" for direction in axis] for axis in _DIRECTIONS]
+    for name in LIMB_NAMES
+], dtype=object)
+
+# Every cue the engine can produce, e.g. for pre-synthesizing speech
+FEEDBACK_VOCABULARY = tuple(CUE_MESSAGES.ravel().tolist())
+
+
+def _as_batch(poses):
+    """Accept a PoseLandmarks, a (33, 4) array or an (N, 33, 4) array."""
+    poses = getattr(poses, "data", poses)
+    poses = np.asarray(poses, dtype=np.float32)
+    if poses.ndim == 2:
+        poses = poses[None]
+    return poses
+
+
+def limb_centroids(poses, limb_index=LIMB_INDEX):
+    """Mean (x, y) of each limb's joints: (..., 33, 4) -> (..., L, 2)."""
+    return poses[..., limb_index, :2].mean(axis=-2)
+
+
+class PoseScores:
+    """
+    Result of scoring N user poses against M reference poses.
+
+    Attributes:
+        deltas (np.ndarray): (N, M, L, 2) user minus reference limb centroids.
+        hits (np.ndarray): (N, M, L, 2) bool, True where a delta passes its threshold.
+        order (np.ndarray): (N, M, L*2) cue indices ranked by descending |delta|.
+        cue_count (np.ndarray): (N, M) number of cues past threshold.
+        accuracy (np.ndarray): (N, M) int accuracy percentage.
+    """
+
+    def __init__(self, deltas, hits, order, cue_count, accuracy):
+        self.deltas = deltas
+        self.hits = hits
+        self.order = order
+        self.cue_count = cue_count
+        self.accuracy = accuracy
+
+    def _cue_message(self, n, m, cue):
+        limb, axis = divmod(int(cue), 2)
+        return CUE_MESSAGES[limb, axis, int(self.deltas[n, m, limb, axis] > 0)]
+
+    def message(self, n=0, m=0, default=GOOD_ALIGNMENT_MESSAGE):
+        """Top-ranked cue for user n against reference m, or default when aligned."""
+        if self.cue_count[n, m] == 0:
+            return default
+        return self._cue_message(n, m, self.order[n, m, 0])
+
+    def ranked(self, n=0, m=0):
+        """All cues for user n against reference m, largest correction first."""
+        return [
+            self._cue_message(n, m, cue)
+            for cue in self.order[n, m, :self.cue_count[n, m]]
+        ]
+
+
+def score_poses(users, refs, x_threshold=X_THRESHOLD, y_threshold=Y_THRESHOLD,
+                limb_index=LIMB_INDEX, key_points=ACCURACY_KEY_POINTS):
+    """
+    Score every user pose against every reference pose in one vectorized pass.
+
+    Args:
+        users: (N, 33, 4) array, a single (33, 4) array, or a PoseLandmarks.
+        refs: (M, 33, 4) array, a single (33, 4) array, or a PoseLandmarks.
+        limb_index (np.ndarray): (L, K) landmark indices per limb.
+        key_points (np.ndarray): Landmark indices used for the accuracy score.
+
+    Returns:
+        PoseScores: deltas, threshold hits, ranked cues and accuracy for all pairs.
+    """
+    users = _as_batch(users)
+    refs = _as_batch(refs)
+    n, m = users.shape[0], refs.shape[0]
+
+    # Limb centroid deltas for all pairs: (N, M, L, 2)
+    deltas = limb_centroids(users, limb_index)[:, None] - limb_centroids(refs, limb_index)[None]
+    magnitude = np.abs(deltas)
+    hits = magnitude > np.array([x_threshold, y_threshold], dtype=np.float32)
+
+    # Rank cues by size; cues under threshold sort last. The stable sort
+    # keeps limb order (x before y) for equal deltas.
+    ranked = np.where(hits, magnitude, -1.0).reshape(n, m, -1)
+    order = np.argsort(-ranked, axis=-1, kind="stable")
+    cue_count = hits.reshape(n, m, -1).sum(axis=-1)
+
+    # Mean key-point distance for all pairs: (N, M)
+    errors = np.linalg.norm(
+        users[:, None, key_points, :2] - refs[None, :, key_points, :2], axis=-1
+    ).mean(axis=-1)
+    accuracy = np.clip(100 * (1 - errors / ACCURACY_ERROR_SCALE), 0, 100).astype(np.int32)
+
+    return PoseScores(deltas, hits, order, cue_count, accuracy)
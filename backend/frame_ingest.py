@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+
+class LatestFrameSlot:
+    """
+    Single-slot, latest-frame-wins mailbox for one session.
+
+    The receive loop puts every incoming frame; if the previous one has not
+    been picked up yet it is replaced and counted as dropped. The processing
+    loop always gets the newest pending frame together with how long it sat
+    in the slot, so feedback is never computed on a stale pose.
+    """
+
+    def __init__(self):
+        self._item = None
+        self._received_at = 0.0
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def put(self, item):
+        """Store the newest frame. Returns True if it replaced one not yet processed."""
+        replaced = self._item is not None
+        if replaced:
+            self.dropped += 1
+        self._item = item
+        self._received_at = time.monotonic()
+        self.received += 1
+        self._ready.set()
+        return replaced
+
+    async def get(self):
+        """Wait for the newest frame. Returns (item, age_seconds), or None once closed."""
+        while self._item is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        item = self._item
+        age = time.monotonic() - self._received_at
+        self._item = None
+        self.processed += 1
+        return item, age
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    def stats(self, age=0.0):
+        """Ingest counters reported back to the client with each result."""
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "queue_age_ms": round(age * 1000, 1)
+        }
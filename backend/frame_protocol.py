@@ -0,0 +1,104 @@
+import struct
+
+import cv2
+import numpy as np
+
+# Binary frame protocol for the /ws/pose endpoint.
+#
+# Each binary WebSocket message is a fixed little-endian header followed by
+# the frame payload:
+#
+#   uint32  frame_id     client-side frame counter, echoed back in responses
+#   float64 timestamp    client capture time in ms (e.g. performance.now())
+#   uint8   codec        one of the CODEC_* constants below
+#   uint8   reserved
+#   uint16  width        frame width in pixels (required for raw codecs)
+#   uint16  height       frame height in pixels (required for raw codecs)
+#
+# The payload is read straight out of the receive buffer with
+# np.frombuffer, so no intermediate copies are made before decoding.
+FRAME_HEADER = struct.Struct("<IdBxHH")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+CODEC_JPEG = 1
+CODEC_WEBP = 2
+CODEC_RGB = 3
+CODEC_RGBA = 4
+
+CODEC_NAMES = {
+    CODEC_JPEG: "jpeg",
+    CODEC_WEBP: "webp",
+    CODEC_RGB: "rgb",
+    CODEC_RGBA: "rgba",
+}
+
+_RAW_CHANNELS = {
+    CODEC_RGB: 3,
+    CODEC_RGBA: 4,
+}
+
+
+class FrameProtocolError(ValueError):
+    """Raised when a binary frame message is malformed."""
+
+
+class FrameHeader:
+    __slots__ = ("frame_id", "timestamp", "codec", "width", "height")
+
+    def __init__(self, frame_id, timestamp, codec, width, height):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.codec = codec
+        self.width = width
+        self.height = height
+
+
+def pack_frame(frame_id, timestamp, codec, width, height, payload):
+    """Build a binary frame message (used by tools and tests)."""
+    return FRAME_HEADER.pack(frame_id, timestamp, codec, width, height) + bytes(payload)
+
+
+def parse_frame_header(message):
+    """Parse the fixed header at the start of a binary frame message."""
+    if len(message) < FRAME_HEADER_SIZE:
+        raise FrameProtocolError(
+            f"Frame message too short: {len(message)} bytes, header needs {FRAME_HEADER_SIZE}"
+        )
+    frame_id, timestamp, codec, width, height = FRAME_HEADER.unpack_from(message, 0)
+    if codec not in CODEC_NAMES:
+        raise FrameProtocolError(f"Unknown frame codec: {codec}")
+    return FrameHeader(frame_id, timestamp, codec, width, height)
+
+
+def decode_frame_rgb(message):
+    """
+    Decode a binary frame message into an RGB image for MediaPipe.
+
+    Args:
+        message (bytes | bytearray | memoryview): Raw WebSocket message.
+
+    Returns:
+        tuple: (FrameHeader, np.ndarray) with the image in RGB order.
+    """
+    header = parse_frame_header(message)
+    payload = np.frombuffer(message, dtype=np.uint8, offset=FRAME_HEADER_SIZE)
+
+    if header.codec in _RAW_CHANNELS:
+        channels = _RAW_CHANNELS[header.codec]
+        expected = header.width * header.height * channels
+        if header.width == 0 or header.height == 0 or payload.size != expected:
+            raise FrameProtocolError(
+                f"Raw {CODEC_NAMES[header.codec]} payload is {payload.size} bytes, "
+                f"expected {expected} for {header.width}x{header.height}"
+            )
+        image = payload.reshape(header.height, header.width, channels)
+        if header.codec == CODEC_RGBA:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
+        return header, image
+
+    # JPEG / WebP: imdecode reads the payload view directly
+    image = cv2.imdecode(payload, cv2.IMREAD_COLOR)
+    if image is None:
+        raise FrameProtocolError(f"Could not decode {CODEC_NAMES[header.codec]} payload")
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return header, image
@@ -0,0 +1,118 @@
+import os
+
+import cv2
+import numpy as np
+
+# Adaptive inference: skip up to MAX_SKIP frames between inferences while
+# the scene is still, keeping inference under INFERENCE_BUDGET of one core.
+# Disable with ALIGNIFY_FRAME_SKIP=off.
+FRAME_SKIP_ENABLED = os.getenv("ALIGNIFY_FRAME_SKIP", "auto").lower() not in ("off", "0", "false")
+MAX_SKIP = int(os.getenv("ALIGNIFY_MAX_SKIP", "4"))
+INFERENCE_BUDGET = float(os.getenv("ALIGNIFY_INFERENCE_BUDGET", "0.5"))
+
+# Mean absolute grey-level change on the motion probe that forces inference
+MOTION_THRESHOLD = 6.0
+PROBE_SIZE = (64, 48)
+
+# Never extrapolate further than this past the last inference
+MAX_EXTRAPOLATION = 0.25
+
+
+class InferenceScheduler:
+    """
+    Decides, frame by frame, whether pose inference needs to run.
+
+    Inference runs when the motion probe (a tiny greyscale copy of the
+    frame compared with the last inferred one) changes past a threshold,
+    or when the current skip allowance is used up. The allowance adapts
+    so the share of wall time spent in inference stays near the budget.
+    Skipped frames get landmarks extrapolated from the last two results.
+    """
+
+    def __init__(self, max_skip=MAX_SKIP, budget=INFERENCE_BUDGET,
+                 motion_threshold=MOTION_THRESHOLD, enabled=FRAME_SKIP_ENABLED):
+        self.max_skip = max_skip
+        self.budget = budget
+        self.motion_threshold = motion_threshold
+        self.enabled = enabled
+        self.skip = 0
+        self.since_inference = 0
+        self.inference_time = 0.0
+        self.frame_interval = 1 / 30
+        self.last_frame_time = None
+        self.last_pose = None
+        self.last_pose_time = 0.0
+        self.velocity = None
+        # Preallocated motion probe buffers
+        self._probe_bgr = np.empty((PROBE_SIZE[1], PROBE_SIZE[0], 3), dtype=np.uint8)
+        self._probe = np.empty((PROBE_SIZE[1], PROBE_SIZE[0]), dtype=np.uint8)
+        self._reference_probe = np.empty_like(self._probe)
+        self._diff = np.empty_like(self._probe)
+        self._has_reference = False
+
+    def _update_probe(self, frame):
+        cv2.resize(frame, PROBE_SIZE, dst=self._probe_bgr, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._probe_bgr, cv2.COLOR_BGR2GRAY, dst=self._probe)
+
+    def should_infer(self, frame, timestamp):
+        """True if inference should run on this frame (BGR)."""
+        if self.last_frame_time is not None:
+            interval = timestamp - self.last_frame_time
+            if interval > 0:
+                self.frame_interval = 0.9 * self.frame_interval + 0.1 * interval
+        self.last_frame_time = timestamp
+
+        if not self.enabled or self.last_pose is None or self.since_inference >= self.skip:
+            return True
+
+        self._update_probe(frame)
+        if self._has_reference:
+            cv2.absdiff(self._probe, self._reference_probe, dst=self._diff)
+            if float(self._diff.mean()) > self.motion_threshold:
+                return True
+
+        self.since_inference += 1
+        return False
+
+    def record(self, pose, timestamp, inference_seconds, frame=None):
+        """Store an inference result (a (33, 4) array, or None) and adapt the skip rate."""
+        self.since_inference = 0
+        self.inference_time = 0.8 * self.inference_time + 0.2 * inference_seconds
+        if frame is not None and self.enabled:
+            self._update_probe(frame)
+            self._reference_probe[...] = self._probe
+            self._has_reference = True
+
+        if pose is None:
+            self.last_pose = None
+            self.velocity = None
+        else:
+            if self.last_pose is not None and timestamp > self.last_pose_time:
+                self.velocity = (pose[:, :3] - self.last_pose[:, :3]) / (timestamp - self.last_pose_time)
+            self.last_pose = pose
+            self.last_pose_time = timestamp
+
+        # Share of wall time inference would use at the current skip rate
+        load = self.inference_time / (self.frame_interval * (self.skip + 1))
+        if load > self.budget and self.skip < self.max_skip:
+            self.skip += 1
+        elif load < self.budget * 0.5 and self.skip > 0:
+            self.skip -= 1
+
+    def estimate(self, timestamp):
+        """Extrapolated (33, 4) landmarks for a skipped frame, or None."""
+        if self.last_pose is None:
+            return None
+        if self.velocity is None:
+            return self.last_pose
+        dt = min(timestamp - self.last_pose_time, MAX_EXTRAPOLATION)
+        estimate = self.last_pose.copy()
+        estimate[:, :3] += self.velocity * dt
+        return estimate
+
+    def reset(self):
+        """Forget the tracked pose (a new clip or person); the learned skip rate is kept."""
+        self.since_inference = 0
+        self.last_pose = None
+        self.velocity = None
+        self._has_reference = False
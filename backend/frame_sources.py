@@ -0,0 +1,301 @@
+import glob
+import logging
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from landmark_io import IMAGE_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# "native" replays recorded input at its own frame rate, "fast" delivers
+# frames as fast as they are read (for profiling and load tests)
+PACING = os.getenv("ALIGNIFY_PACING", "native")
+
+# Frame rate for image sequences and files that don't report one
+DEFAULT_FPS = 30.0
+
+
+class FrameSource:
+    """
+    Base for frame sources with the cv2.VideoCapture reading interface.
+
+    grab()/retrieve() and read() behave like their VideoCapture
+    counterparts, so FrameGrabber, the servers and the kiosk can take any
+    source in place of a camera. Subclasses implement _grab() and
+    _retrieve(); this class adds pacing at a fixed frame rate.
+    """
+
+    def __init__(self, fps=DEFAULT_FPS, pacing=PACING):
+        if pacing not in ("native", "fast"):
+            raise ValueError(f"Unknown pacing {pacing!r}; use 'native' or 'fast'")
+        self.fps = fps
+        self.pacing = pacing
+        self._next_frame_time = None
+
+    def _wait_for_frame_time(self):
+        if self.pacing != "native" or not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_frame_time is None or now - self._next_frame_time > 1.0:
+            # First frame, or far behind schedule: restart the clock
+            self._next_frame_time = now
+        elif self._next_frame_time > now:
+            time.sleep(self._next_frame_time - now)
+        self._next_frame_time += 1 / self.fps
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        self._wait_for_frame_time()
+        return self._grab()
+
+    def retrieve(self, image=None):
+        return self._retrieve(image)
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        pass
+
+    def _grab(self):
+        raise NotImplementedError
+
+    def _retrieve(self, image):
+        raise NotImplementedError
+
+
+class CameraSource(FrameSource):
+    """Live camera or network stream; the device sets the pace."""
+
+    def __init__(self, target=0):
+        super().__init__(fps=None, pacing="fast")
+        self.capture = cv2.VideoCapture(target)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def _grab(self):
+        return self.capture.grab()
+
+    def _retrieve(self, image):
+        return self.capture.retrieve(image)
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video file, optionally looping, paced at its own frame rate."""
+
+    def __init__(self, path, pacing=PACING, loop=True):
+        self.capture = cv2.VideoCapture(path)
+        fps = self.capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        super().__init__(fps=fps, pacing=pacing)
+        self.path = path
+        self.loop = loop
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def _grab(self):
+        if self.capture.grab():
+            return True
+        if not self.loop:
+            return False
+        # End of file: rewind and keep going
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.capture.grab()
+
+    def _retrieve(self, image):
+        return self.capture.retrieve(image)
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """
+    Images from a directory or glob pattern, played as a video.
+
+    Images are decoded once at open and resized to the first image's size,
+    since consumers expect a constant frame shape.
+    """
+
+    def __init__(self, pattern, fps=DEFAULT_FPS, pacing=PACING, loop=True):
+        super().__init__(fps=fps, pacing=pacing)
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            paths = glob.glob(pattern, recursive=True)
+        paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+        self.frames = []
+        for path in paths:
+            image = cv2.imread(path)
+            if image is None:
+                logger.warning(f"Skipping unreadable image {path}")
+                continue
+            if self.frames and image.shape != self.frames[0].shape:
+                height, width = self.frames[0].shape[:2]
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            self.frames.append(image)
+        self.loop = loop
+        self.position = -1
+
+    def isOpened(self):
+        return bool(self.frames)
+
+    def _grab(self):
+        if not self.frames:
+            return False
+        if self.position + 1 >= len(self.frames):
+            if not self.loop:
+                return False
+            self.position = -1
+        self.position += 1
+        return True
+
+    def _retrieve(self, image):
+        if self.position < 0:
+            return False, None
+        frame = self.frames[self.position]
+        if image is None:
+            return True, frame.copy()
+        np.copyto(image, frame)
+        return True, image
+
+
+# Shared-memory frame exchange: a 16-byte header (sequence counter, frame
+# count) followed by one BGR frame. The writer makes the sequence odd while
+# it copies, so readers can detect and retry torn frames.
+SHM_HEADER_DTYPE = np.dtype([("seq", "<u8"), ("frames", "<u8")])
+
+
+def shm_size(shape):
+    return SHM_HEADER_DTYPE.itemsize + int(np.prod(shape))
+
+
+class SharedMemoryFrameWriter:
+    """Publishes frames to a named shared-memory block for SharedMemorySource readers."""
+
+    def __init__(self, name, shape, create=True):
+        self.shape = tuple(shape)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=shm_size(self.shape))
+        self.header = np.ndarray((), dtype=SHM_HEADER_DTYPE, buffer=self.shm.buf)
+        self.frame = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                offset=SHM_HEADER_DTYPE.itemsize)
+        if create:
+            self.header["seq"] = 0
+            self.header["frames"] = 0
+
+    def write(self, frame):
+        self.header["seq"] += 1  # Odd: write in progress
+        np.copyto(self.frame, frame)
+        self.header["frames"] += 1
+        self.header["seq"] += 1
+
+    def close(self, unlink=True):
+        del self.header, self.frame
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SharedMemorySource(FrameSource):
+    """
+    Frames published by another process through SharedMemoryFrameWriter.
+
+    grab() waits for a frame newer than the last one read; the writer sets
+    the pace, so this source never adds pacing of its own.
+    """
+
+    def __init__(self, name, shape, timeout=1.0):
+        super().__init__(fps=None, pacing="fast")
+        self.shape = tuple(shape)
+        self.timeout = timeout
+        self.shm = None
+        try:
+            self.shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            logger.error(f"Shared memory frame block {name!r} does not exist")
+            return
+        # Attaching registers the block with this process's resource tracker,
+        # which would unlink it on exit; the writer owns it
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.header = np.ndarray((), dtype=SHM_HEADER_DTYPE, buffer=self.shm.buf)
+        self.frame = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                offset=SHM_HEADER_DTYPE.itemsize)
+        self.last_frames = 0
+
+    def isOpened(self):
+        return self.shm is not None
+
+    def _grab(self):
+        deadline = time.monotonic() + self.timeout
+        while int(self.header["frames"]) == self.last_frames:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def _retrieve(self, image):
+        out = image if image is not None else np.empty(self.shape, dtype=np.uint8)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            seq = int(self.header["seq"])
+            if seq % 2 == 0:
+                frames = int(self.header["frames"])
+                np.copyto(out, self.frame)
+                if int(self.header["seq"]) == seq:
+                    self.last_frames = frames
+                    return True, out
+            # Write in progress or torn copy; a writer that died mid-frame
+            # leaves the sequence odd, so give up at the deadline
+            if time.monotonic() > deadline:
+                logger.warning("Timed out waiting for a complete shared-memory frame")
+                return False, out
+            time.sleep(0.001)
+
+    def release(self):
+        if self.shm is not None:
+            del self.header, self.frame
+            self.shm.close()
+            self.shm = None
+
+
+def open_frame_source(target, pacing=PACING, loop=True):
+    """
+    Open a frame source from a target description.
+
+    Targets:
+        0, "1"                       camera index
+        "rtsp://...", "http://..."   network stream
+        "shm://name?shape=720x1280"  shared memory (height x width, BGR)
+        "clips/warrior.mp4"          video file
+        "recordings/", "frames/*.png" image directory or glob
+
+    Recorded inputs (files and image sequences) rewind at the end when loop
+    is set and are paced at their own frame rate unless pacing is "fast".
+    """
+    if isinstance(target, int) or str(target).isdigit():
+        return CameraSource(int(target))
+    target = str(target)
+    if target.startswith("shm://"):
+        parsed = urlparse(target)
+        shape = parse_qs(parsed.query).get("shape", ["720x1280"])[0]
+        height, width = (int(n) for n in shape.lower().split("x"))
+        return SharedMemorySource(parsed.netloc, (height, width, 3))
+    if "://" in target:
+        return CameraSource(target)
+    if os.path.isdir(target) or any(c in target for c in "*?[") or target.lower().endswith(IMAGE_EXTENSIONS):
+        return ImageSequenceSource(target, pacing=pacing, loop=loop)
+    return VideoFileSource(target, pacing=pacing, loop=loop)
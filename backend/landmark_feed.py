@@ -0,0 +1,37 @@
+import asyncio
+
+
+class LandmarkFeed:
+    """
+    Hands pose results from the capture thread to the asyncio loop.
+
+    The capture thread calls publish_threadsafe() whenever inference
+    produces a new result; subscribers wake up immediately instead of
+    polling, and every result carries a monotonically increasing
+    sequence number so the same result is never sent twice.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.seq = 0
+        self.latest = None
+        self._changed = asyncio.Event()
+
+    def publish_threadsafe(self, seq, landmarks):
+        """Publish a result from any thread."""
+        self.loop.call_soon_threadsafe(self._publish, seq, landmarks)
+
+    def _publish(self, seq, landmarks):
+        # Results can only move forward; stale or repeated ones are ignored
+        if seq <= self.seq:
+            return
+        self.seq = seq
+        self.latest = landmarks
+        self._changed.set()
+
+    async def wait_next(self, last_seq):
+        """Wait for a result newer than last_seq. Returns (seq, landmarks)."""
+        while self.seq <= last_seq:
+            self._changed.clear()
+            await self._changed.wait()
+        return self.seq, self.latest
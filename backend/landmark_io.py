@@ -0,0 +1,75 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+from pose_landmarks import LANDMARK_SHAPE
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def collect_images(inputs):
+    """Expand directories (recursively) and glob patterns into a sorted list of image paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.add(os.path.join(root, name))
+        else:
+            for path in glob.glob(item, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.add(path)
+    return sorted(paths)
+
+
+# -------------------------------
+# Output stores
+# -------------------------------
+def load_jsonl(path):
+    """Existing JSON Lines results keyed by file path."""
+    records = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    records[record["file"]] = record
+    return records
+
+
+def load_npz(path):
+    """Existing NPZ results keyed by file path."""
+    records = {}
+    if os.path.exists(path):
+        with np.load(path) as data:
+            for file, sha1, landmarks, detected in zip(
+                    data["files"], data["sha1"], data["landmarks"], data["detected"]):
+                records[str(file)] = {
+                    "file": str(file),
+                    "sha1": str(sha1),
+                    "landmarks": landmarks.tolist() if detected else None
+                }
+    return records
+
+
+def save_npz(path, records):
+    files = sorted(records)
+    landmarks = np.zeros((len(files),) + LANDMARK_SHAPE, dtype=np.float32)
+    detected = np.zeros(len(files), dtype=bool)
+    for i, file in enumerate(files):
+        if records[file]["landmarks"] is not None:
+            landmarks[i] = records[file]["landmarks"]
+            detected[i] = True
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        files=np.array(files),
+        sha1=np.array([records[file]["sha1"] for file in files]),
+        landmarks=landmarks,
+        detected=detected
+    )
+    os.replace(tmp_path, path)
@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import urllib.request
+from collections import defaultdict, deque
+from datetime import datetime
+from urllib.parse import urlparse, urlunparse
+
+import cv2
+import numpy as np
+import websockets
+
+from frame_protocol import CODEC_JPEG, pack_frame
+from landmark_io import collect_images
+
+DEFAULT_URLS = {
+    "fastapi": "ws://127.0.0.1:8000/ws/pose",
+    "app": "ws://127.0.0.1:5000/ws",
+}
+
+# Poses cycled through by simulated app.py clients
+DEFAULT_POSES = ("Warrior 1", "Warrior 2", "Star", "Goddess")
+
+
+def load_frames(inputs, width=640, quality=80):
+    """Encode recorded images as JPEG frames like the browser sends. Returns (jpeg bytes, w, h) per frame."""
+    frames = []
+    for path in collect_images(inputs):
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        if image.shape[1] > width:
+            height = round(image.shape[0] * width / image.shape[1])
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            frames.append((encoded.tobytes(), image.shape[1], image.shape[0]))
+    return frames
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+class StepStats:
+    """Counters and round-trip samples shared by all clients of one load step."""
+
+    def __init__(self):
+        self.connected = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.sent = 0
+        self.received = 0
+        self.server_errors = 0
+        self.unanswered = 0  # Frames the server replaced with a newer one
+        self.missed_updates = 0  # Gaps in the app.py update sequence
+        self.rtt = []
+        self.action_rtt = defaultdict(list)
+
+    def summary(self, clients, duration):
+        return {
+            "clients": clients,
+            "connected": self.connected,
+            "connect_failures": self.connect_failures,
+            "disconnects": self.disconnects,
+            "sent_per_s": round(self.sent / duration, 1),
+            "received_per_s": round(self.received / duration, 1),
+            "server_errors": self.server_errors,
+            "unanswered_frames": self.unanswered,
+            "missed_updates": self.missed_updates,
+            "rtt": percentiles(self.rtt),
+            "action_rtt": {action: percentiles(samples) for action, samples in self.action_rtt.items()},
+        }
+
+
+async def fastapi_client(url, frames, fps, stats, stop):
+    """Stream binary frames at a fixed rate and time each frame's result."""
+    async with websockets.connect(url, max_size=None, open_timeout=10) as websocket:
+        stats.connected += 1
+        pending = {}
+
+        async def receive():
+            async for message in websocket:
+                now = time.perf_counter()
+                stats.received += 1
+                data = json.loads(message)
+                if data.get("type") == "error":
+                    stats.server_errors += 1
+                frame_id = data.get("frame_id")
+                sent_at = pending.pop(frame_id, None)
+                if sent_at is not None:
+                    stats.rtt.append(now - sent_at)
+                    # Older frames still pending were dropped by latest-frame-wins ingest
+                    for stale in [f for f in pending if f < frame_id]:
+                        del pending[stale]
+                        stats.unanswered += 1
+
+        receiver = asyncio.create_task(receive())
+        try:
+            # Stagger clients so they don't all send on the same tick
+            await asyncio.sleep(random.random() / fps)
+            next_send = time.perf_counter()
+            for frame_id in itertools.count(1):
+                if stop.is_set() or receiver.done():
+                    break
+                jpeg, width, height = frames[frame_id % len(frames)]
+                pending[frame_id] = time.perf_counter()
+                await websocket.send(pack_frame(frame_id, time.time() * 1000, CODEC_JPEG, width, height, jpeg))
+                stats.sent += 1
+                next_send += 1 / fps
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+            if receiver.done() and not stop.is_set():
+                stats.disconnects += 1
+        finally:
+            receiver.cancel()
+
+
+async def app_client(url, poses, action_interval, calibrate, stats, stop):
+    """Receive app.py's pushed updates while cycling through session actions."""
+    async with websockets.connect(url, max_size=None, open_timeout=10) as websocket:
+        stats.connected += 1
+        pending = deque()
+
+        async def receive():
+            last_seq = None
+            async for message in websocket:
+                now = time.perf_counter()
+                stats.received += 1
+                data = json.loads(message)
+                if "seq" in data:
+                    if last_seq is not None and data["seq"] > last_seq + 1:
+                        stats.missed_updates += data["seq"] - last_seq - 1
+                    last_seq = data["seq"]
+                elif pending:
+                    # Action replies arrive in the order the actions were sent
+                    action, sent_at = pending.popleft()
+                    stats.action_rtt[action].append(now - sent_at)
+                    if data.get("calibration_success") is False or "Unknown source" in data.get("message", ""):
+                        stats.server_errors += 1
+
+        # One cycle: start a session, (calibrate and) move through every pose, end it
+        script = [("startSession", poses[0])]
+        for pose in poses:
+            if calibrate:
+                script.append(("calibrate", pose))
+            script.append(("changePose", pose))
+        script.append(("endSession", None))
+
+        receiver = asyncio.create_task(receive())
+        try:
+            await asyncio.sleep(random.random() * action_interval)
+            for action, pose in itertools.cycle(script):
+                if stop.is_set() or receiver.done():
+                    break
+                message = {"action": action}
+                if pose is not None:
+                    message["pose"] = pose
+                pending.append((action, time.perf_counter()))
+                await websocket.send(json.dumps(message))
+                stats.sent += 1
+                await asyncio.sleep(action_interval * random.uniform(0.5, 1.5))
+            if receiver.done() and not stop.is_set():
+                stats.disconnects += 1
+        finally:
+            receiver.cancel()
+
+
+async def run_client(index, args, frames, stats, stop):
+    url = args.url
+    if args.target == "app":
+        separator = "&" if "?" in url else "?"
+        url = f"{url}{separator}user=load{index}"
+    try:
+        if args.target == "fastapi":
+            await fastapi_client(url, frames, args.fps, stats, stop)
+        else:
+            await app_client(url, args.poses, 1 / args.action_rate, args.calibrate, stats, stop)
+    except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake):
+        stats.connect_failures += 1
+    except websockets.exceptions.ConnectionClosed:
+        if not stop.is_set():
+            stats.disconnects += 1
+
+
+def metrics_url(ws_url):
+    """HTTP /metrics URL on the same host and port as a WebSocket URL."""
+    parsed = urlparse(ws_url)
+    scheme = "https" if parsed.scheme == "wss" else "http"
+    return urlunparse((scheme, parsed.netloc, "/metrics", "", "format=json", ""))
+
+
+def fetch_server_metrics(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return json.load(response)
+    except (OSError, ValueError):
+        return None
+
+
+async def run_step(args, frames, clients):
+    stats = StepStats()
+    stop = asyncio.Event()
+    tasks = []
+    # Open connections at connect_rate per second instead of in one burst
+    for i in range(clients):
+        tasks.append(asyncio.create_task(run_client(i, args, frames, stats, stop)))
+        if args.connect_rate:
+            await asyncio.sleep(1 / args.connect_rate)
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    duration = time.perf_counter() - started
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    result = stats.summary(clients, duration)
+    if args.server_metrics:
+        loop = asyncio.get_running_loop()
+        result["server_metrics"] = await loop.run_in_executor(None, fetch_server_metrics, metrics_url(args.url))
+    return result
+
+
+def print_step(result):
+    rtt = result["rtt"] or next((r for r in result["action_rtt"].values() if r), None)
+    latency = f"p50 {rtt['p50_ms']} / p95 {rtt['p95_ms']} / p99 {rtt['p99_ms']} ms" if rtt else "no replies"
+    print(f"{result['clients']:>5} clients: {result['connected']} connected, "
+          f"{result['connect_failures']} failed, {result['disconnects']} dropped | "
+          f"{result['sent_per_s']} sent/s, {result['received_per_s']} received/s | RTT {latency} | "
+          f"{result['server_errors']} errors, {result['unanswered_frames']} unanswered, "
+          f"{result['missed_updates']} missed updates")
+
+
+async def run(args):
+    frames = []
+    if args.target == "fastapi":
+        frames = load_frames(args.inputs, args.width)
+        if not frames:
+            print("No frames found to stream.")
+            return 1
+
+    results = []
+    for clients in args.clients:
+        result = await run_step(args, frames, clients)
+        print_step(result)
+        results.append(result)
+        await asyncio.sleep(args.pause)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "target": args.target,
+            "url": args.url,
+            "fps": args.fps if args.target == "fastapi" else None,
+            "action_rate": args.action_rate if args.target == "app" else None,
+            "duration": args.duration,
+            "steps": results,
+        }, f, indent=2)
+    print(f"\nResults saved to '{args.output}'.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate many concurrent WebSocket clients against the Alignify servers."
+    )
+    parser.add_argument("target", choices=sorted(DEFAULT_URLS),
+                        help="fastapi: stream frames to /ws/pose; app: drive session actions on app.py")
+    parser.add_argument("--url", help="WebSocket URL (default depends on target)")
+    parser.add_argument("-c", "--clients", default="10,50,100,200",
+                        help="Comma-separated client counts, one load step each")
+    parser.add_argument("-d", "--duration", type=float, default=20, help="Seconds per step")
+    parser.add_argument("--fps", type=float, default=15, help="Frames per second per client (fastapi)")
+    parser.add_argument("--width", type=int, default=640, help="Width of streamed frames (fastapi)")
+    parser.add_argument("--action-rate", type=float, default=0.5,
+                        help="Actions per second per client (app)")
+    parser.add_argument("--poses", default=",".join(DEFAULT_POSES), help="Comma-separated pose names (app)")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Include calibrate actions (app); this writes to the server's calibration store")
+    parser.add_argument("--connect-rate", type=float, default=100, help="New connections per second")
+    parser.add_argument("--pause", type=float, default=2, help="Seconds between steps")
+    parser.add_argument("--no-server-metrics", dest="server_metrics", action="store_false",
+                        help="Don't fetch the server's /metrics after each step")
+    parser.add_argument("inputs", nargs="*", default=["calibration", "*.jpg"],
+                        help="Images to stream (fastapi; default: calibration/ and *.jpg)")
+    parser.add_argument("-o", "--output", default="loadtest_results.json", help="JSON results file")
+    args = parser.parse_args(argv)
+    args.url = args.url or DEFAULT_URLS[args.target]
+    args.clients = [int(n) for n in args.clients.split(",") if n.strip()]
+    args.poses = [p.strip() for p in args.poses.split(",") if p.strip()]
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets, 0.1 ms to 5 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+# Pipeline stages timed by the servers, in pipeline order. "capture_wait" is
+# time spent waiting for the source to deliver a frame (camera blocking or
+# file pacing), "capture" the cost of retrieving it once it has arrived.
+STAGES = ("capture_wait", "capture", "decode", "convert", "inference", "map_back", "smooth",
+          "feedback", "serialize", "send")
+
+METRIC_PREFIX = "alignify"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; cheap enough to observe every frame."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+        }
+
+
+class Metrics:
+    """
+    Per-process registry of stage timings, counters and gauges.
+
+    Stage timings and counters are recorded from any thread. Gauges are
+    callables returning {label: value}, read only when metrics are exported
+    (used for per-client send lag).
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_many(self, timings):
+        """Record a {stage: seconds} dict, e.g. timings returned by a worker process."""
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, read):
+        """Register a callable returning {label: value}, read at export time."""
+        self.gauges[name] = read
+
+    def snapshot(self):
+        """All metrics as a JSON-friendly dict."""
+        with self._lock:
+            stages = {
+                name: self.stages[name].snapshot()
+                for name in sorted(self.stages, key=lambda s: (STAGES + (s,)).index(s))
+            }
+            counters = dict(self.counters)
+        gauges = {name: read() for name, read in self.gauges.items()}
+        return {"stages": stages, "counters": counters, "gauges": gauges}
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = [f"# TYPE {METRIC_PREFIX}_stage_seconds histogram"]
+        with self._lock:
+            for name, histogram in self.stages.items():
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += n
+                    lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+                lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+        for name, read in self.gauges.items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for label, value in read().items():
+                lines.append(f'{METRIC_PREFIX}_{name}{{client="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def json(self):
+        return json.dumps(self.snapshot())
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Text styles: font scale, and (dx, dy, BGR colour, thickness) layers
+# drawn in order, e.g. a shadow or outline under the main text
+WELCOME_STYLE = (5.0, ((3, 3, (50, 50, 50), 5), (0, 0, (255, 255, 255), 5)))
+COUNTDOWN_STYLE = (12.0, ((0, 0, (0, 0, 0), 32), (0, 0, (255, 255, 255), 20)))
+
+# Cached sprites are keyed by text and style; cleared when this many pile up
+MAX_SPRITES = 64
+
+
+class TextSprite:
+    """Pre-rendered text: a BGR patch, its mask, and the text metrics it was laid out with."""
+
+    def __init__(self, text, font_scale, layers):
+        # Laid out by the top layer (the main text), like the original drawing code
+        (self.text_width, self.text_height), baseline = cv2.getTextSize(text, FONT, font_scale, layers[-1][3])
+        max_thickness = max(thickness for _, _, _, thickness in layers)
+        max_offset = max(max(abs(dx), abs(dy)) for dx, dy, _, _ in layers)
+        self.pad = max_thickness + max_offset
+        h = self.text_height + baseline + 2 * self.pad
+        w = self.text_width + 2 * self.pad
+        self.image = np.zeros((h, w, 3), dtype=np.uint8)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        origin = (self.pad, self.pad + self.text_height)
+        for dx, dy, color, thickness in layers:
+            position = (origin[0] + dx, origin[1] + dy)
+            cv2.putText(self.image, text, position, FONT, font_scale, color, thickness)
+            cv2.putText(mask, text, position, FONT, font_scale, 255, thickness)
+        self.mask = mask.astype(bool)[..., None]
+
+    def draw(self, canvas, x, y):
+        """Blend onto canvas in place with the text baseline origin at (x, y)."""
+        top = y - self.text_height - self.pad
+        left = x - self.pad
+        h, w = self.image.shape[:2]
+        # Clip to the canvas
+        y0, x0 = max(top, 0), max(left, 0)
+        y1, x1 = min(top + h, canvas.shape[0]), min(left + w, canvas.shape[1])
+        if y0 >= y1 or x0 >= x1:
+            return
+        sy, sx = y0 - top, x0 - left
+        np.copyto(
+            canvas[y0:y1, x0:x1],
+            self.image[sy:sy + y1 - y0, sx:sx + x1 - x0],
+            where=self.mask[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        )
+
+
+class OverlayCompositor:
+    """
+    Draws the kiosk overlays with cached sprites and no per-frame allocations.
+
+    begin() copies the camera frame into a persistent canvas; the overlay
+    methods then work on that canvas in place: dimming is one in-place
+    weighted pass, text is a cached sprite copied through its mask, and
+    the reference thumbnail is resized and tinted once per image.
+    """
+
+    def __init__(self):
+        self.canvas = None
+        self._sprites = {}
+        self._thumbnail = None
+        self._thumbnail_source = None  # Held so the identity check below stays valid
+        self._thumbnail_key = None
+
+    def begin(self, frame):
+        """Copy a frame into the reused canvas and return the canvas."""
+        if self.canvas is None or self.canvas.shape != frame.shape:
+            self.canvas = np.empty_like(frame)
+        np.copyto(self.canvas, frame)
+        return self.canvas
+
+    def sprite(self, text, style):
+        key = (text, style)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            if len(self._sprites) >= MAX_SPRITES:
+                self._sprites.clear()
+            sprite = self._sprites[key] = TextSprite(text, *style)
+        return sprite
+
+    @staticmethod
+    def dim(canvas, level, alpha):
+        """Blend canvas towards a flat grey level, in place."""
+        cv2.addWeighted(canvas, 1 - alpha, canvas, 0, alpha * level, dst=canvas)
+
+    def welcome(self, canvas):
+        self.dim(canvas, 0, 0.80)
+        sprite = self.sprite("ALIGNIFY", WELCOME_STYLE)
+        h, w = canvas.shape[:2]
+        # Centered, moved up to make room for the button
+        sprite.draw(canvas, (w - sprite.text_width) // 2, (h - sprite.text_height) // 2 - 50)
+        return canvas
+
+    def countdown(self, canvas, number):
+        self.dim(canvas, 32, 0.6)
+        sprite = self.sprite(str(number), COUNTDOWN_STYLE)
+        h, w = canvas.shape[:2]
+        sprite.draw(canvas, (w - sprite.text_width) // 2, (h + sprite.text_height) // 2)
+        return canvas
+
+    def thumbnail(self, canvas, image, scale=0.25, margin=20, alpha=0.8):
+        """Paste a tinted, scaled copy of image into the bottom-right corner."""
+        key = (image.shape, scale, alpha)
+        if self._thumbnail_source is not image or self._thumbnail_key != key:
+            ref_h, ref_w = image.shape[:2]
+            small = cv2.resize(image, (int(ref_w * scale), int(ref_h * scale)))
+            # Blend with white once, instead of every frame
+            cv2.addWeighted(small, alpha, small, 0, (1 - alpha) * 255, dst=small)
+            self._thumbnail = small
+            self._thumbnail_source = image
+            self._thumbnail_key = key
+        small = self._thumbnail
+        new_h, new_w = small.shape[:2]
+        y_offset = canvas.shape[0] - new_h - margin
+        x_offset = canvas.shape[1] - new_w - margin
+        if y_offset >= 0 and x_offset >= 0:
+            canvas[y_offset:y_offset + new_h, x_offset:x_offset + new_w] = small
+        return canvas
@@ -0,0 +1,110 @@
+import glob
+import logging
+import os
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from roi import RoiCropper
+
+logger = logging.getLogger(__name__)
+
+mp_pose = mp.solutions.pose
+
+# Deployment settings for every MediaPipe Pose instance. Model complexity
+# is 0 (lite), 1 (full) or 2 (heavy); "auto" benchmarks the levels on the
+# sample images at startup and keeps the most accurate one that runs
+# within ALIGNIFY_LATENCY_TARGET_MS per frame.
+MODEL_COMPLEXITY = os.getenv("ALIGNIFY_MODEL_COMPLEXITY", "1")
+MIN_DETECTION_CONFIDENCE = float(os.getenv("ALIGNIFY_MIN_DETECTION_CONFIDENCE", "0.5"))
+MIN_TRACKING_CONFIDENCE = float(os.getenv("ALIGNIFY_MIN_TRACKING_CONFIDENCE", "0.5"))
+ENABLE_SEGMENTATION = os.getenv("ALIGNIFY_SEGMENTATION", "off").lower() in ("on", "1", "true")
+LATENCY_TARGET_MS = float(os.getenv("ALIGNIFY_LATENCY_TARGET_MS", "40"))
+
+COMPLEXITY_LEVELS = (0, 1, 2)
+SAMPLE_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration", "*.png")
+
+# Auto-tuned complexity, measured once per process
+_tuned_complexity = None
+
+
+def auto_tune(sample_images=SAMPLE_IMAGES, latency_target_ms=LATENCY_TARGET_MS,
+              levels=COMPLEXITY_LEVELS, repeats=5):
+    """
+    Pick the highest model complexity whose median per-frame latency meets the target.
+
+    Each level runs in tracking mode on every sample image, prepared the
+    way the servers prepare frames; the first call per image (detection)
+    is not timed. Falls back to the lowest level if none meets the target.
+
+    Returns:
+        int: Model complexity.
+    """
+    frames = []
+    cropper = RoiCropper()
+    for path in sorted(glob.glob(sample_images)):
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(cropper.crop(image).copy())
+    if not frames:
+        logger.warning(f"No sample images match {sample_images}; using model complexity {levels[0]}")
+        return levels[0]
+
+    chosen = levels[0]
+    for level in sorted(levels):
+        timings = []
+        with mp_pose.Pose(**pose_settings(model_complexity=level)) as detector:
+            for frame in frames:
+                detector.process(frame)
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    detector.process(frame)
+                    timings.append(time.perf_counter() - started)
+        latency_ms = float(np.median(timings)) * 1000
+        logger.info(f"Model complexity {level}: {latency_ms:.1f} ms median over {len(timings)} frames")
+        if latency_ms > latency_target_ms:
+            break
+        chosen = level
+    logger.info(f"Auto-tuned model complexity {chosen} (target {latency_target_ms:.0f} ms)")
+    return chosen
+
+
+def resolve_model_complexity(value=MODEL_COMPLEXITY):
+    """Model complexity as an int, auto-tuning (once per process) for "auto"."""
+    global _tuned_complexity
+    if str(value).lower() != "auto":
+        return int(value)
+    if _tuned_complexity is None:
+        _tuned_complexity = auto_tune()
+    return _tuned_complexity
+
+
+def pose_settings(static_image_mode=False, model_complexity=None,
+                  min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+                  min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+                  enable_segmentation=ENABLE_SEGMENTATION):
+    """
+    Keyword arguments for mp.solutions.pose.Pose.
+
+    The result is a plain dict, so it can be resolved once and sent to
+    worker processes.
+    """
+    return {
+        "static_image_mode": static_image_mode,
+        "model_complexity": resolve_model_complexity(
+            MODEL_COMPLEXITY if model_complexity is None else model_complexity
+        ),
+        "smooth_landmarks": True,
+        "enable_segmentation": enable_segmentation,
+        "min_detection_confidence": min_detection_confidence,
+        "min_tracking_confidence": min_tracking_confidence,
+    }
+
+
+def create_pose_detector(settings=None, **overrides):
+    """Build a MediaPipe Pose from resolved settings, or from the deployment defaults plus overrides."""
+    if settings is None:
+        settings = pose_settings(**overrides)
+    return mp_pose.Pose(**settings)
@@ -0,0 +1,202 @@
+import numpy as np
+
+from pose_landmarks import (
+    LANDMARK_SHAPE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+    LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE,
+    LEFT_ANKLE, RIGHT_ANKLE
+)
+
+# Joints that make up the pose embedding
+BODY_JOINTS = np.array([
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST,
+    RIGHT_WRIST, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE,
+    RIGHT_ANKLE
+], dtype=np.intp)
+
+# (a, b, c) triples; the angle is measured at b
+JOINT_ANGLES = np.array([
+    (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    (LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP),
+    (RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP),
+    (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+], dtype=np.intp)
+
+# Relative weight of the angle features vs. the normalized coordinates
+ANGLE_WEIGHT = 2.0
+
+EMBEDDING_SIZE = BODY_JOINTS.size * 2 + len(JOINT_ANGLES)
+
+# Embedding coordinates are in torso lengths (see pose_embedding). Two takes
+# of the same pose typically differ by about this much per joint...
+JOINT_TOLERANCE = 0.25
+# ...which over all BODY_JOINTS is an embedding distance of this, where
+# confidence falls to 1/e (angle features ignored)
+CONFIDENCE_SCALE = JOINT_TOLERANCE * float(np.sqrt(BODY_JOINTS.size))
+
+# Initial capacity of the index arrays; they double when full
+INITIAL_CAPACITY = 16
+
+
+def pose_embedding(poses):
+    """
+    Centered, scale-invariant pose embedding.
+
+    Coordinates are centered on the hip midpoint and divided by torso
+    length (shoulder midpoint to hip midpoint), then joined with the
+    main joint angles normalized to [0, 1].
+
+    Args:
+        poses: (N, 33, 4) or (33, 4) array, or a PoseLandmarks.
+
+    Returns:
+        np.ndarray: (N, EMBEDDING_SIZE) or (EMBEDDING_SIZE,) float32 embedding.
+    """
+    poses = np.asarray(getattr(poses, "data", poses), dtype=np.float32)
+    single = poses.ndim == 2
+    if single:
+        poses = poses[None]
+    xy = poses[..., :2]
+
+    hip_center = (xy[:, LEFT_HIP] + xy[:, RIGHT_HIP]) / 2
+    shoulder_center = (xy[:, LEFT_SHOULDER] + xy[:, RIGHT_SHOULDER]) / 2
+    torso = np.linalg.norm(shoulder_center - hip_center, axis=-1)
+    torso = np.maximum(torso, 1e-6)[:, None, None]
+    coords = (xy[:, BODY_JOINTS] - hip_center[:, None]) / torso
+
+    ba = xy[:, JOINT_ANGLES[:, 0]] - xy[:, JOINT_ANGLES[:, 1]]
+    bc = xy[:, JOINT_ANGLES[:, 2]] - xy[:, JOINT_ANGLES[:, 1]]
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    dot = (ba * bc).sum(axis=-1)
+    angles = np.abs(np.arctan2(cross, dot)) / np.pi
+
+    embedding = np.concatenate(
+        [coords.reshape(len(poses), -1), ANGLE_WEIGHT * angles], axis=-1
+    ).astype(np.float32)
+    return embedding[0] if single else embedding
+
+
+class PoseIndex:
+    """
+    In-memory nearest-neighbour index over reference pose embeddings.
+
+    Entries are keyed (e.g. by (user, pose)) and carry a label, so
+    recalibrating a pose replaces its entry. The reference landmarks are
+    kept alongside so a match can be scored directly. Queries are one
+    matrix product against all entries. Storage grows by doubling, so
+    adding N entries one at a time costs O(N) copies in total.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.labels = []
+        self.rows = {}
+        self._poses = np.zeros((INITIAL_CAPACITY,) + LANDMARK_SHAPE, dtype=np.float32)
+        self._embeddings = np.zeros((INITIAL_CAPACITY, EMBEDDING_SIZE), dtype=np.float32)
+        self._norms = np.zeros(INITIAL_CAPACITY, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Views of the filled rows
+    @property
+    def poses(self):
+        return self._poses[:len(self.keys)]
+
+    @property
+    def embeddings(self):
+        return self._embeddings[:len(self.keys)]
+
+    @property
+    def norms(self):
+        return self._norms[:len(self.keys)]
+
+    def _reserve(self, count):
+        capacity = len(self._norms)
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        n = len(self.keys)
+        for name in ("_poses", "_embeddings", "_norms"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+    def add(self, key, label, landmarks):
+        """Add or replace the entry for key."""
+        data = np.asarray(getattr(landmarks, "data", landmarks), dtype=np.float32)
+        embedding = pose_embedding(data)
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            self._reserve(row + 1)
+            self.rows[key] = row
+            self.keys.append(key)
+            self.labels.append(label)
+        else:
+            self.labels[row] = label
+        self._poses[row] = data
+        self._embeddings[row] = embedding
+        self._norms[row] = embedding @ embedding
+
+    def add_many(self, keys, labels, poses):
+        """Bulk add from an (N, 33, 4) array; keys must not already be present."""
+        poses = np.asarray(poses, dtype=np.float32).reshape((-1,) + LANDMARK_SHAPE)
+        embeddings = pose_embedding(poses)
+        start = len(self.keys)
+        self._reserve(start + len(poses))
+        for key, label in zip(keys, labels):
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label)
+        end = len(self.keys)
+        self._poses[start:end] = poses
+        self._embeddings[start:end] = embeddings
+        self._norms[start:end] = (embeddings * embeddings).sum(axis=-1)
+
+    def query(self, poses, k=1):
+        """
+        Nearest entries for each pose.
+
+        Returns:
+            tuple: (indices (N, k), distances (N, k)) sorted nearest first.
+        """
+        queries = pose_embedding(poses)
+        if queries.ndim == 1:
+            queries = queries[None]
+        k = min(k, len(self.keys))
+        # Squared distances via |a|^2 - 2ab + |b|^2
+        distances = (self.norms[None] - 2 * queries @ self.embeddings.T
+                     + (queries * queries).sum(axis=-1)[:, None])
+        np.maximum(distances, 0, out=distances)
+        if k < len(self.keys):
+            nearest = np.argpartition(distances, k - 1, axis=-1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(len(self.keys)), distances.shape)
+        nearest_dist = np.take_along_axis(distances, nearest, axis=-1)
+        order = np.argsort(nearest_dist, axis=-1)
+        nearest = np.take_along_axis(nearest, order, axis=-1)
+        return nearest, np.sqrt(np.take_along_axis(nearest_dist, order, axis=-1))
+
+    def classify(self, landmarks):
+        """
+        Closest reference for one pose.
+
+        Returns:
+            tuple: (label, confidence in [0, 1], key), or (None, 0.0, None) if empty.
+        """
+        if not self.keys:
+            return None, 0.0, None
+        nearest, distances = self.query(landmarks)
+        row = int(nearest[0, 0])
+        confidence = float(np.exp(-float(distances[0, 0]) / CONFIDENCE_SCALE))
+        return self.labels[row], confidence, self.keys[row]
+
+    def reference(self, key):
+        """Reference landmarks stored for key, as a (33, 4) array."""
+        return self.poses[self.rows[key]]
@@ -0,0 +1,129 @@
+import numpy as np
+
+# MediaPipe Pose landmark indices
+NOSE = 0
+LEFT_EYE_INNER = 1
+LEFT_EYE = 2
+LEFT_EYE_OUTER = 3
+RIGHT_EYE_INNER = 4
+RIGHT_EYE = 5
+RIGHT_EYE_OUTER = 6
+LEFT_EAR = 7
+RIGHT_EAR = 8
+MOUTH_LEFT = 9
+MOUTH_RIGHT = 10
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_PINKY = 17
+RIGHT_PINKY = 18
+LEFT_INDEX = 19
+RIGHT_INDEX = 20
+LEFT_THUMB = 21
+RIGHT_THUMB = 22
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+LEFT_HEEL = 29
+RIGHT_HEEL = 30
+LEFT_FOOT_INDEX = 31
+RIGHT_FOOT_INDEX = 32
+
+LANDMARK_NAMES = (
+    "NOSE", "LEFT_EYE_INNER", "LEFT_EYE", "LEFT_EYE_OUTER",
+    "RIGHT_EYE_INNER", "RIGHT_EYE", "RIGHT_EYE_OUTER", "LEFT_EAR",
+    "RIGHT_EAR", "MOUTH_LEFT", "MOUTH_RIGHT", "LEFT_SHOULDER",
+    "RIGHT_SHOULDER", "LEFT_ELBOW", "RIGHT_ELBOW", "LEFT_WRIST",
+    "RIGHT_WRIST", "LEFT_PINKY", "RIGHT_PINKY", "LEFT_INDEX",
+    "RIGHT_INDEX", "LEFT_THUMB", "RIGHT_THUMB", "LEFT_HIP",
+    "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE",
+    "RIGHT_ANKLE", "LEFT_HEEL", "RIGHT_HEEL", "LEFT_FOOT_INDEX",
+    "RIGHT_FOOT_INDEX",
+)
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+
+NUM_LANDMARKS = len(LANDMARK_NAMES)
+
+# Column layout of the landmark array
+X, Y, Z, VISIBILITY = 0, 1, 2, 3
+LANDMARK_SHAPE = (NUM_LANDMARKS, 4)
+
+
+class PoseLandmarks:
+    """
+    Compact pose: a (33, 4) float32 array of x, y, z, visibility per landmark.
+
+    Feedback, accuracy and serialization work on the array directly; the
+    dict formats are only built at the edges for JSON clients and for
+    reading older calibration files.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32).reshape(LANDMARK_SHAPE)
+
+    @classmethod
+    def from_mediapipe(cls, pose_landmarks):
+        """Build from a MediaPipe NormalizedLandmarkList (results.pose_landmarks)."""
+        data = np.empty(LANDMARK_SHAPE, dtype=np.float32)
+        for i, lm in enumerate(pose_landmarks.landmark):
+            data[i] = (lm.x, lm.y, lm.z, lm.visibility)
+        return cls(data)
+
+    @classmethod
+    def from_dict(cls, landmarks):
+        """Build from the index-keyed wire format: {"0": {"x":.., "y":.., "z":..}, ...}."""
+        data = np.zeros(LANDMARK_SHAPE, dtype=np.float32)
+        for index, values in landmarks.items():
+            data[int(index)] = (
+                values["x"], values["y"], values["z"], values.get("visibility", 1.0)
+            )
+        return cls(data)
+
+    @classmethod
+    def from_named(cls, landmarks):
+        """Build from the name-keyed format used in landmarks.json: {"NOSE": [x, y, z], ...}."""
+        data = np.zeros(LANDMARK_SHAPE, dtype=np.float32)
+        for name, coords in landmarks.items():
+            row = data[LANDMARK_INDEX[name]]
+            row[:len(coords)] = coords
+            if len(coords) < 4:
+                row[VISIBILITY] = 1.0
+        return cls(data)
+
+    @property
+    def xy(self):
+        return self.data[:, :2]
+
+    def copy(self):
+        return PoseLandmarks(self.data.copy())
+
+    def to_dict(self, include_visibility=True):
+        """Serialize to the index-keyed wire format sent to WebSocket clients."""
+        rows = self.data.tolist()
+        if include_visibility:
+            return {
+                str(i): {"x": x, "y": y, "z": z, "visibility": v}
+                for i, (x, y, z, v) in enumerate(rows)
+            }
+        return {str(i): {"x": x, "y": y, "z": z} for i, (x, y, z, _) in enumerate(rows)}
+
+    def to_named(self):
+        """Serialize to the name-keyed (x, y, z) format used in landmarks.json."""
+        return {name: row[:3] for name, row in zip(LANDMARK_NAMES, self.data.tolist())}
+
+    def to_mediapipe(self):
+        """Build a MediaPipe NormalizedLandmarkList, e.g. for drawing_utils."""
+        from mediapipe.framework.formats import landmark_pb2
+
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, v in self.data.tolist():
+            landmark_list.landmark.add(x=x, y=y, z=z, visibility=v)
+        return landmark_list
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_protocol import decode_frame_rgb
+from metrics import metrics
+from pose_detector import create_pose_detector, pose_settings
+from pose_landmarks import PoseLandmarks
+from roi import RoiCropper
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Worker-process side
+# -------------------------------
+# Each worker process keeps one MediaPipe tracker per session pinned to it,
+# so temporal tracking state is never shared between users.
+_trackers = {}
+# Pose tracker settings, resolved once in the parent and sent to every worker
+_pose_settings = None
+# Per-session crop region around the tracked person
+_croppers = {}
+
+
+def _init_worker(settings):
+    global _pose_settings
+    _pose_settings = settings
+
+
+def _get_tracker(session_id):
+    tracker = _trackers.get(session_id)
+    if tracker is None:
+        tracker = create_pose_detector(_pose_settings)
+        _trackers[session_id] = tracker
+    return tracker
+
+
+def _get_cropper(session_id):
+    cropper = _croppers.get(session_id)
+    if cropper is None:
+        cropper = RoiCropper()
+        _croppers[session_id] = cropper
+    return cropper
+
+
+def _detect(session_id, frame, timings, code=None):
+    """
+    Run the session's tracker on a frame and return a (33, 4) array or None.
+
+    The frame is RGB unless a cv2 colour conversion code is given; it is
+    cropped to the tracked person and converted in one pass. Stage times
+    are added to timings, which is sent back to the parent process.
+    """
+    cropper = _get_cropper(session_id)
+    started = time.perf_counter()
+    frame_rgb = cropper.crop(frame, code=code)
+    converted = time.perf_counter()
+    tracker = _get_tracker(session_id)
+    if cropper.moved:
+        # The tracker's region of interest is relative to the old crop
+        tracker.reset()
+    results = tracker.process(frame_rgb)
+    inferred = time.perf_counter()
+    timings["convert"] = converted - started
+    timings["inference"] = inferred - converted
+    if not results.pose_landmarks:
+        cropper.reset()
+        return None
+    landmarks = cropper.map_back(PoseLandmarks.from_mediapipe(results.pose_landmarks).data)
+    timings["map_back"] = time.perf_counter() - inferred
+    return landmarks
+
+
+def _detect_frame_message(session_id, message):
+    started = time.perf_counter()
+    header, frame_rgb = decode_frame_rgb(message)
+    timings = {"decode": time.perf_counter() - started}
+    return (header.frame_id, header.timestamp, _detect(session_id, frame_rgb, timings)), timings
+
+
+def _detect_encoded_image(session_id, image_bytes):
+    started = time.perf_counter()
+    frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image data")
+    timings = {"decode": time.perf_counter() - started}
+    return _detect(session_id, frame, timings, code=cv2.COLOR_BGR2RGB), timings
+
+
+def _close_tracker(session_id):
+    _croppers.pop(session_id, None)
+    tracker = _trackers.pop(session_id, None)
+    if tracker is not None:
+        tracker.close()
+
+
+# -------------------------------
+# Event-loop side
+# -------------------------------
+class PoseWorkerPool:
+    """
+    Pool of pose-inference processes.
+
+    Every session is pinned to one worker for its lifetime and gets its own
+    tracker there. Frames are dispatched with run_in_executor so inference
+    never blocks the event loop.
+    """
+
+    def __init__(self, size=None, settings=None):
+        if size is None:
+            size = int(os.getenv("POSE_WORKERS", "0")) or os.cpu_count() or 1
+        self.size = max(1, size)
+        # Resolve (and auto-tune, if configured) here so workers don't each benchmark
+        self.settings = settings if settings is not None else pose_settings()
+        ctx = multiprocessing.get_context("spawn")
+        self.workers = [
+            ProcessPoolExecutor(max_workers=1, mp_context=ctx, initializer=_init_worker,
+                                initargs=(self.settings,))
+            for _ in range(self.size)
+        ]
+        self.session_workers = {}
+        self.worker_load = [0] * self.size
+        logger.info(f"Started pose worker pool with {self.size} workers "
+                    f"(model complexity {self.settings['model_complexity']})")
+
+    def open_session(self):
+        """Pin a new session to the least loaded worker and return its id."""
+        session_id = uuid.uuid4().hex
+        index = min(range(self.size), key=self.worker_load.__getitem__)
+        self.session_workers[session_id] = index
+        self.worker_load[index] += 1
+        return session_id
+
+    async def close_session(self, session_id):
+        index = self.session_workers.pop(session_id, None)
+        if index is None:
+            return
+        self.worker_load[index] -= 1
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.workers[index], _close_tracker, session_id)
+        except Exception as e:
+            logger.error(f"Error closing tracker for session {session_id}: {str(e)}")
+
+    async def _run(self, session_id, func, *args):
+        loop = asyncio.get_running_loop()
+        worker = self.workers[self.session_workers[session_id]]
+        result, timings = await loop.run_in_executor(worker, func, session_id, *args)
+        # Workers can't share this process's registry, so they report stage times back
+        metrics.observe_many(timings)
+        return result
+
+    async def process_frame_message(self, session_id, message):
+        """Decode and run a binary frame message. Returns (frame_id, timestamp, landmark array)."""
+        return await self._run(session_id, _detect_frame_message, message)
+
+    async def process_encoded_image(self, session_id, image_bytes):
+        """Decode and run an encoded JPEG/PNG/WebP image. Returns a landmark array or None."""
+        return await self._run(session_id, _detect_encoded_image, image_bytes)
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+        self.session_workers.clear()
+        self.worker_load = [0] * self.size
@@ -1,74 +1,168 @@
-import cv2
-import mediapipe as mp
+import argparse
+import hashlib
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# Initialize MediaPipe Pose in static image mode.
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=True, min_detection_confidence=0.5)
+import cv2
+import numpy as np
 
-def extract_landmarks(image_path):
+from landmark_io import collect_images, load_jsonl, load_npz, save_npz
+from pose_detector import MODEL_COMPLEXITY, create_pose_detector, resolve_model_complexity
+from pose_landmarks import PoseLandmarks
+
+# Per-process MediaPipe Pose instance, created by the pool initializer.
+pose = None
+
+
+def init_worker(min_detection_confidence=0.5, model_complexity=None):
+    """Create this worker's static-image Pose instance."""
+    global pose
+    pose = create_pose_detector(static_image_mode=True, model_complexity=model_complexity,
+                                min_detection_confidence=min_detection_confidence)
+
+
+def detect_landmarks(image_path):
     """
-    Extracts pose landmarks from a given image file.
-    
+    Runs pose detection on one image file.
+
     Args:
         image_path (str): Path to the image file.
-        
+
     Returns:
-        dict: A dictionary with landmark names as keys and their (x, y, z) coordinates as values.
-              Returns None if no landmarks are detected.
+        tuple: (image_path, (33, 4) float32 array or None, error message or None)
     """
+    if pose is None:
+        init_worker()
+
     # Load the image using OpenCV.
     image = cv2.imread(image_path)
     if image is None:
-        print(f"Error: Unable to load image '{image_path}'")
-        return None
-    
+        return image_path, None, "unable to load image"
+
     # Convert the image from BGR to RGB as MediaPipe expects RGB images.
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
-    # Process the image with MediaPipe Pose.
-    results = pose.process(image_rgb)
-    
-    if results.pose_landmarks:
-        # Create a dictionary mapping landmark names to their normalized coordinates.
-        landmarks = {
-            mp_pose.PoseLandmark(i).name: (lm.x, lm.y, lm.z)
-            for i, lm in enumerate(results.pose_landmarks.landmark)
-        }
-        return landmarks
-    else:
-        print(f"No landmarks detected in '{image_path}'.")
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    results = pose.process(image)
+
+    if not results.pose_landmarks:
+        return image_path, None, "no landmarks detected"
+    return image_path, PoseLandmarks.from_mediapipe(results.pose_landmarks).data, None
+
+
+def extract_landmarks(image_path):
+    """
+    Extracts pose landmarks from a given image file.
+
+    Args:
+        image_path (str): Path to the image file.
+
+    Returns:
+        dict: A dictionary with landmark names as keys and their (x, y, z) coordinates as values.
+              Returns None if no landmarks are detected.
+    """
+    _, landmarks, error = detect_landmarks(image_path)
+    if landmarks is None:
+        print(f"Error: {error} in '{image_path}'")
         return None
+    return PoseLandmarks(landmarks).to_named()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents, used to skip images that have not changed."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def main():
-    # List of your image files.
-    image_files = [
-            "warrior.jpg",
-    "warrrior_II_left.jpg",
-    "warrrior_II_right.jpg",
-    "tree.jpg",
-    "downward_dog.jpg"
-    ]
-    
-    # Dictionary to store landmark data for each image.
-    landmarks_data = {}
-    
-    # Process each image and store its landmarks.
-    for file in image_files:
-        print(f"\nProcessing '{file}'...")
-        landmarks = extract_landmarks(file)
-        if landmarks:
-            landmarks_data[file] = landmarks
-            for name, coords in landmarks.items():
-                print(f"{name}: {coords}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Batch-extract MediaPipe pose landmarks from reference images."
+    )
+    parser.add_argument("inputs", nargs="*", default=["calibration", "*.jpg"],
+                        help="Image files, directories or glob patterns (default: calibration/ and *.jpg)")
+    parser.add_argument("-o", "--output", default="landmarks.jsonl",
+                        help="Output file; .jsonl streams one record per image, .npz stores packed arrays")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of inference processes")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-extract images even if their content hash is unchanged")
+    parser.add_argument("--min-detection-confidence", type=float, default=0.5)
+    parser.add_argument("--model-complexity", default=None,
+                        help="0, 1, 2 or auto (default: ALIGNIFY_MODEL_COMPLEXITY)")
+    args = parser.parse_args(argv)
+
+    use_npz = args.output.endswith(".npz")
+    image_files = collect_images(args.inputs)
+    if not image_files:
+        print("No images found.")
+        return 1
+
+    # Skip images whose content hash matches the previous run.
+    previous = {} if args.force else (load_npz(args.output) if use_npz else load_jsonl(args.output))
+    hashes = {path: file_hash(path) for path in image_files}
+    records = {}
+    pending = []
+    for path in image_files:
+        old = previous.get(path)
+        if old is not None and old["sha1"] == hashes[path]:
+            records[path] = old
         else:
-            print(f"Landmark extraction failed for '{file}'.")
-    
-    # Save the landmark data to a JSON file.
-    with open("landmarks.json", "w") as f:
-        json.dump(landmarks_data, f, indent=4)
-    
-    print("\nLandmark extraction complete. Data saved to 'landmarks.json'.")
+            pending.append(path)
+
+    print(f"Found {len(image_files)} images: {len(records)} unchanged, {len(pending)} to extract "
+          f"with {args.workers} workers.")
+
+    # Resolve once here so workers don't each run the auto-tune benchmark
+    model_complexity = resolve_model_complexity(
+        args.model_complexity if args.model_complexity is not None else MODEL_COMPLEXITY
+    )
+
+    started = time.time()
+    failed = 0
+    out = None
+    tmp_path = args.output + ".tmp"
+    if not use_npz:
+        # Stream results: unchanged records first, then new ones as they finish.
+        out = open(tmp_path, "w")
+        for record in records.values():
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                 initargs=(args.min_detection_confidence, model_complexity)) as executor:
+            chunksize = max(1, len(pending) // (args.workers * 4))
+            for done, (path, landmarks, error) in enumerate(
+                    executor.map(detect_landmarks, pending, chunksize=chunksize), 1):
+                if error:
+                    failed += 1
+                    print(f"{path}: {error}", file=sys.stderr)
+                record = {
+                    "file": path,
+                    "sha1": hashes[path],
+                    "landmarks": np.round(landmarks, 6).tolist() if landmarks is not None else None
+                }
+                records[path] = record
+                if out is not None:
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                if done % 100 == 0:
+                    print(f"Extracted {done}/{len(pending)} images...")
+    finally:
+        if out is not None:
+            out.close()
+
+    if use_npz:
+        save_npz(args.output, records)
+    else:
+        os.replace(tmp_path, args.output)
+
+    print(f"\nLandmark extraction complete in {time.time() - started:.1f}s "
+          f"({failed} without landmarks). Data saved to '{args.output}'.")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
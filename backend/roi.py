@@ -0,0 +1,203 @@
+import os
+
+import cv2
+import numpy as np
+
+from pose_landmarks import VISIBILITY, X, Y, Z
+
+# Inference input sizes. While a person is tracked only a square region
+# around them is fed to the model at ROI_SIZE x ROI_SIZE; otherwise the
+# whole frame is downscaled so its longest side is at most DETECT_SIZE.
+# Disable cropping with ALIGNIFY_ROI=off.
+ROI_ENABLED = os.getenv("ALIGNIFY_ROI", "on").lower() not in ("off", "0", "false")
+ROI_SIZE = int(os.getenv("ALIGNIFY_ROI_SIZE", "256"))
+DETECT_SIZE = int(os.getenv("ALIGNIFY_DETECT_SIZE", "640"))
+
+# Extra space around the landmark bounding box, as a fraction of its size
+# on each side, so limbs moving between frames stay inside the crop
+ROI_MARGIN = 0.35
+
+# Landmarks below this visibility don't shape the bounding box
+ROI_MIN_VISIBILITY = 0.5
+
+# The crop is only moved when a visible landmark comes within this fraction
+# of the crop size of one of its edges (edges on the frame border excepted),
+# or when the person takes up less than ROI_SHRINK_RATIO of its area
+ROI_EDGE_BAND = 0.1
+ROI_SHRINK_RATIO = 0.4
+
+# When this many landmarks lose visibility (e.g. a limb left the crop) the
+# crop grows by ROI_GROW instead of shrinking to the landmarks still seen
+ROI_VISIBILITY_DROP = 3
+ROI_GROW = 1.3
+
+# Crops covering more of the frame than this are not worth it; the whole
+# frame is downscaled instead
+ROI_MAX_COVERAGE = 0.75
+
+
+class RoiCropper:
+    """
+    Crops and downscales frames to the tracked person before inference.
+
+    crop() returns the RGB model input, written into preallocated buffers;
+    map_back() converts the model's landmarks from crop coordinates to
+    full-frame normalized coordinates and updates the region for the next
+    frame. When detection fails, reset() returns to full-frame detection.
+
+    The region is kept still with hysteresis, because MediaPipe's tracker
+    carries its own region of interest between frames in input coordinates.
+    crop() sets moved when the input region differs from the previous
+    frame's; callers then reset the tracker before processing.
+    """
+
+    def __init__(self, roi_size=ROI_SIZE, detect_size=DETECT_SIZE, margin=ROI_MARGIN,
+                 enabled=ROI_ENABLED):
+        self.roi_size = roi_size
+        self.detect_size = detect_size
+        self.margin = margin
+        self.enabled = enabled
+        self.box = None  # Tracked (x0, y0, w, h) in pixels
+        self.region = None  # (x0, y0, w, h) of the region behind the last crop
+        self.frame_size = None  # (width, height) of the last cropped frame
+        self.moved = False  # The last crop's region differs from the one before
+        self._visible = 0  # Visible landmarks when the box was last placed
+        self._buffers = {}
+
+    def _buffer(self, height, width, channels):
+        key = (height, width, channels)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(key, dtype=np.uint8)
+            self._buffers[key] = buffer
+        return buffer
+
+    def reset(self):
+        """Forget the tracked region; the next frame is searched in full."""
+        self.box = None
+
+    def crop(self, frame, code=cv2.COLOR_BGR2RGB):
+        """
+        Model input for a frame.
+
+        Args:
+            frame (np.ndarray): Full camera frame.
+            code: cv2 colour conversion to RGB, or None if frame is already RGB.
+
+        Returns:
+            np.ndarray: RGB image, valid until the next call.
+        """
+        height, width = frame.shape[:2]
+        if self.frame_size != (width, height):
+            self.box = None
+        self.frame_size = (width, height)
+        previous = self.region
+        if self.enabled and self.box is not None:
+            x0, y0, w, h = self.box
+            region = frame[y0:y0 + h, x0:x0 + w]
+            self.region = self.box
+            scale = min(1.0, self.roi_size / max(w, h))
+        else:
+            region = frame
+            self.region = (0, 0, width, height)
+            scale = min(1.0, self.detect_size / max(width, height)) if self.enabled else 1.0
+        out_w, out_h = max(1, round(region.shape[1] * scale)), max(1, round(region.shape[0] * scale))
+        self.moved = previous is not None and self.region != previous
+
+        if code is None:
+            out = self._buffer(out_h, out_w, 3)
+            if (out_h, out_w) == region.shape[:2]:
+                out[...] = region
+            else:
+                cv2.resize(region, (out_w, out_h), dst=out, interpolation=cv2.INTER_AREA)
+            return out
+
+        out = self._buffer(out_h, out_w, 3)
+        if (out_h, out_w) != region.shape[:2]:
+            # Resize first so the colour conversion touches only the small image
+            cv2.resize(region, (out_w, out_h), dst=out, interpolation=cv2.INTER_AREA)
+            region = out
+        cv2.cvtColor(region, code, dst=out)
+        return out
+
+    def map_back(self, landmarks):
+        """
+        Map (33, 4) landmarks from the last crop to full-frame normalized coordinates.
+
+        Also updates the tracked region from the mapped landmarks.
+        """
+        x0, y0, w, h = self.region
+        width, height = self.frame_size
+        mapped = np.array(landmarks, dtype=np.float32)
+        mapped[:, X] = (mapped[:, X] * w + x0) / width
+        mapped[:, Y] = (mapped[:, Y] * h + y0) / height
+        # MediaPipe scales z like x, relative to the input width
+        mapped[:, Z] *= w / width
+        self._track(mapped)
+        return mapped
+
+    def _clamp(self, cx, cy, w, h):
+        """Box of size (w, h) centred near (cx, cy), moved and clipped to fit the frame."""
+        width, height = self.frame_size
+        w = int(min(max(np.ceil(w), 1), width))
+        h = int(min(max(np.ceil(h), 1), height))
+        x0 = int(np.clip(round(cx - w / 2), 0, width - w))
+        y0 = int(np.clip(round(cy - h / 2), 0, height - h))
+        return x0, y0, w, h
+
+    def _place(self, box, visible):
+        width, height = self.frame_size
+        if box is not None and box[2] * box[3] > ROI_MAX_COVERAGE * width * height:
+            # The person fills most of the frame; cropping would gain little
+            box = None
+        self.box = box
+        self._visible = visible
+
+    def _grow(self, box):
+        x0, y0, w, h = box
+        return self._clamp(x0 + w / 2, y0 + h / 2, w * ROI_GROW, h * ROI_GROW)
+
+    def _track(self, landmarks):
+        if not self.enabled:
+            return
+        width, height = self.frame_size
+        visible = landmarks[landmarks[:, VISIBILITY] >= ROI_MIN_VISIBILITY]
+        if len(visible) < 2:
+            # Not enough to place a box on; widen the view rather than lose it
+            if self.box is not None:
+                self._place(self._grow(self.box), len(visible))
+            return
+        xs = visible[:, X] * width
+        ys = visible[:, Y] * height
+        left, right = xs.min(), xs.max()
+        top, bottom = ys.min(), ys.max()
+        scale = 1 + 2 * self.margin
+        needed = self._clamp((left + right) / 2, (top + bottom) / 2,
+                             (right - left) * scale, (bottom - top) * scale)
+
+        if self.box is None:
+            self._place(needed, len(visible))
+            return
+
+        x0, y0, w, h = self.box
+        if self._visible - len(visible) >= ROI_VISIBILITY_DROP:
+            # Landmarks were lost, possibly cut off by the crop: grow to
+            # cover both the current box and what is still visible
+            gx0, gy0, gw, gh = self._grow(self.box)
+            ux0, uy0 = min(gx0, needed[0]), min(gy0, needed[1])
+            ux1 = max(gx0 + gw, needed[0] + needed[2])
+            uy1 = max(gy0 + gh, needed[1] + needed[3])
+            self._place((ux0, uy0, ux1 - ux0, uy1 - uy0), len(visible))
+            return
+        self._visible = max(self._visible, len(visible))
+
+        band_x, band_y = w * ROI_EDGE_BAND, h * ROI_EDGE_BAND
+        near_edge = (
+            (x0 > 0 and left < x0 + band_x) or
+            (x0 + w < width and right > x0 + w - band_x) or
+            (y0 > 0 and top < y0 + band_y) or
+            (y0 + h < height and bottom > y0 + h - band_y)
+        )
+        too_big = needed[2] * needed[3] < ROI_SHRINK_RATIO * w * h
+        if near_edge or too_big:
+            self._place(needed, len(visible))
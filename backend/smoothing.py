@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from pose_landmarks import LANDMARK_SHAPE
+
+# One Euro filter defaults, tuned for normalized landmark coordinates at
+# webcam rates: low jitter while holding a pose, little lag when moving.
+# Override with ALIGNIFY_SMOOTHING_MIN_CUTOFF / ALIGNIFY_SMOOTHING_BETA,
+# or disable with ALIGNIFY_SMOOTHING=off.
+SMOOTHING_ENABLED = os.getenv("ALIGNIFY_SMOOTHING", "on").lower() not in ("off", "0", "false")
+MIN_CUTOFF = float(os.getenv("ALIGNIFY_SMOOTHING_MIN_CUTOFF", "1.0"))
+BETA = float(os.getenv("ALIGNIFY_SMOOTHING_BETA", "10.0"))
+D_CUTOFF = 1.0
+
+# Assumed frame interval for the first update or a non-increasing timestamp
+DEFAULT_DT = 1 / 30
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class LandmarkSmoother:
+    """
+    Vectorized One Euro filter over many landmark streams.
+
+    Each stream (a session, a camera) has a key; its filter state lives in
+    one row of shared (S, 33, 4) arrays, so any number of streams can be
+    updated with a single call.
+    """
+
+    def __init__(self, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF,
+                 enabled=SMOOTHING_ENABLED, capacity=4):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.enabled = enabled
+        self.slots = {}
+        self.free = []
+        self.x_prev = np.zeros((capacity,) + LANDMARK_SHAPE, dtype=np.float32)
+        self.dx_prev = np.zeros_like(self.x_prev)
+        self.t_prev = np.zeros(capacity, dtype=np.float64)
+        self.initialized = np.zeros(capacity, dtype=bool)
+
+    def _slot(self, key):
+        slot = self.slots.get(key)
+        if slot is not None:
+            return slot
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.slots)
+            if slot >= len(self.t_prev):
+                grow = len(self.t_prev)
+                self.x_prev = np.concatenate([self.x_prev, np.zeros_like(self.x_prev[:grow])])
+                self.dx_prev = np.concatenate([self.dx_prev, np.zeros_like(self.dx_prev[:grow])])
+                self.t_prev = np.concatenate([self.t_prev, np.zeros(grow)])
+                self.initialized = np.concatenate([self.initialized, np.zeros(grow, dtype=bool)])
+        self.slots[key] = slot
+        self.initialized[slot] = False
+        return slot
+
+    def reset(self, key):
+        """Forget a stream's state, e.g. when its session ends or tracking is lost."""
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.initialized[slot] = False
+            self.free.append(slot)
+
+    def update_many(self, keys, poses, timestamps):
+        """
+        Filter one new pose per stream.
+
+        Args:
+            keys (list): Stream keys, one per pose.
+            poses (np.ndarray): (K, 33, 4) raw landmarks.
+            timestamps: (K,) capture times in seconds, or one time for all.
+
+        Returns:
+            np.ndarray: (K, 33, 4) smoothed landmarks.
+        """
+        poses = np.asarray(poses, dtype=np.float32)
+        if not self.enabled:
+            return poses
+        slots = np.array([self._slot(key) for key in keys], dtype=np.intp)
+        t = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), slots.shape)
+
+        first = ~self.initialized[slots]
+        dt = t - self.t_prev[slots]
+        dt = np.where(first | (dt <= 0), DEFAULT_DT, dt)[:, None, None]
+
+        x_prev = self.x_prev[slots]
+        dx = (poses - x_prev) / dt
+        a_d = _alpha(self.d_cutoff, dt)
+        dx_hat = a_d * dx + (1 - a_d) * self.dx_prev[slots]
+
+        # Cutoff rises with speed: smooth hard when still, follow fast moves
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        a = _alpha(cutoff, dt)
+        smoothed = (a * poses + (1 - a) * x_prev).astype(np.float32)
+
+        smoothed[first] = poses[first]
+        dx_hat[first] = 0
+
+        self.x_prev[slots] = smoothed
+        self.dx_prev[slots] = dx_hat
+        self.t_prev[slots] = t
+        self.initialized[slots] = True
+        return smoothed
+
+    def update(self, key, pose, timestamp):
+        """Filter a single stream's pose: (33, 4) in, (33, 4) out."""
+        return self.update_many([key], np.asarray(pose)[None], timestamp)[0]
@@ -3,21 +3,31 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import json
-import requests
-import tempfile
 import os
 import time
 from playsound import playsound
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor
 import threading
+from collections import OrderedDict
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QWidget, QHBoxLayout, QVBoxLayout,
     QPushButton, QProgressBar, QSizePolicy, QFrame, QScrollArea
 )
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QImage, QPixmap, QFont
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPixmap, QFont
+
+from calibration_store import CalibrationStore
+from feedback_engine import FEEDBACK_VOCABULARY, score_poses
+from frame_skipper import InferenceScheduler
+from frame_sources import open_frame_source
+from overlay import OverlayCompositor
+from pose_detector import create_pose_detector
+from pose_landmarks import PoseLandmarks
+from roi import RoiCropper
+from smoothing import LandmarkSmoother
+from tts_cache import create_speech_cache
 
 # -------------------------------
 # Load Environment Variables
@@ -26,6 +36,20 @@ load_dotenv()
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "sk_f2ab8eeecc9d8654b047f708c2d0d0c3045636f119dd60e5")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "IKne3meq5aSn9XLyUdCD")
 
+# Calibration store user for this kiosk
+KIOSK_USER = os.getenv("ALIGNIFY_KIOSK_USER", "kiosk")
+
+# Camera index, video file, image directory or shm:// block to read frames from
+KIOSK_SOURCE = os.getenv("ALIGNIFY_KIOSK_SOURCE", "0")
+
+# Legacy landmarks.json to import into an empty calibration store. Off by
+# default: the bundled file holds the developer's poses, and a new user
+# must always calibrate their own.
+IMPORT_LANDMARKS = os.getenv("ALIGNIFY_IMPORT_LANDMARKS")
+
+# Scaled reference images kept in memory by the info panel
+IMAGE_CACHE_SIZE = 32
+
 # -------------------------------
 # TTS Manager for Non-blocking Speech
 # -------------------------------
@@ -33,33 +57,22 @@ class TTSManager:
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=1)
         self.current_task = None
+        # Phrases are synthesized once and replayed from the cache
+        self.speech = create_speech_cache(ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID)
+    
+    def warm_up(self, phrases):
+        """Pre-synthesize phrases in the background so cues play without a network round-trip."""
+        threading.Thread(target=self.speech.warm_up, args=(list(phrases),), daemon=True).start()
     
     def speak(self, text):
         """Non-blocking TTS function that runs in a separate thread."""
         def tts_task():
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": ELEVENLABS_API_KEY
-            }
-            data = {
-                "text": text,
-                "voice_settings": {
-                    "stability": 0.75,
-                    "similarity_boost": 0.75
-                }
-            }
             try:
-                response = requests.post(url, headers=headers, json=data)
-                if response.status_code == 200:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-                        tmp_file.write(response.content)
-                        tmp_filename = tmp_file.name
-                    playsound(tmp_filename)
-                    os.remove(tmp_filename)
+                path = self.speech.audio_file(text)
+                if path is not None:
+                    playsound(path)
                 else:
-                    print("Error with ElevenLabs TTS:", response.text)
+                    print("No TTS audio for:", text)
             except Exception as e:
                 print("TTS Exception:", e)
         
@@ -74,7 +87,6 @@ class TTSManager:
 # MediaPipe Setup
 # -------------------------------
 mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
 mp_drawing = mp.solutions.drawing_utils
 
 # Drawing specifications
@@ -85,16 +97,6 @@ connection_drawing_spec = mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=4,
 x_threshold = 0.1
 y_threshold = 0.1
 
-body_parts = {
-    'ARM': {
-        'RIGHT': ['LEFT_WRIST', 'LEFT_ELBOW', 'LEFT_SHOULDER'],
-        'LEFT': ['RIGHT_WRIST', 'RIGHT_ELBOW', 'RIGHT_SHOULDER']
-    },
-    'LEG': {
-        'RIGHT': ['LEFT_ANKLE', 'LEFT_KNEE', 'LEFT_HIP'],
-        'LEFT': ['RIGHT_ANKLE', 'RIGHT_KNEE', 'RIGHT_HIP']
-    }
-}
 # -------------------------------
 # Custom Frontend Widgets
 # -------------------------------
@@ -143,6 +145,39 @@ class ModernProgressBar(QProgressBar):
         """)
         self.setTextVisible(False)
 
+class PixmapCache:
+    """
+    LRU cache of images scaled to fit a size.
+
+    Entries are keyed by path, modification time and target size, so an
+    image that is rewritten on disk (e.g. by recalibration) is reloaded.
+    """
+
+    def __init__(self, max_entries=IMAGE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, path, width, height):
+        """Return the scaled QPixmap for path, or None if it can't be read."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        key = (path, mtime, width, height)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+            return pixmap
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return None
+        pixmap = pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self._entries[key] = pixmap
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return pixmap
+
+
 class InfoPanel(QFrame):
     """Modern info panel for displaying text, instructions, images, and the Begin button."""
     def __init__(self, parent=None):
@@ -237,24 +272,91 @@ class InfoPanel(QFrame):
         self.layout.addStretch()
         
         self.setLayout(self.layout)
+
+        self.image_cache = PixmapCache()
+        # What the widgets currently show, to skip redundant updates
+        self._shown = {"title": "Welcome", "timer": "Timer or Countdowns here",
+                       "instruction": "Instructions for user", "pixmap": None}
     
     def update_info(self, title="", timer="", instruction="", image_path=None):
-        """Update panel text and image."""
-        self.title.setText(title)
-        self.timer.setText(timer)
-        self.instruction.setText(instruction)
-        
-        if image_path and os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            scaled_pixmap = pixmap.scaled(
-                self.image_label.width(),
-                self.image_label.height(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            self.image_label.setPixmap(scaled_pixmap)
-        else:
-            self.image_label.clear()
+        """Update panel text and image; widgets are only touched when their content changes."""
+        if title != self._shown["title"]:
+            self.title.setText(title)
+            self._shown["title"] = title
+        if timer != self._shown["timer"]:
+            self.timer.setText(timer)
+            self._shown["timer"] = timer
+        if instruction != self._shown["instruction"]:
+            self.instruction.setText(instruction)
+            self._shown["instruction"] = instruction
+
+        pixmap = None
+        if image_path:
+            pixmap = self.image_cache.get(image_path, self.image_label.width(), self.image_label.height())
+        # Cached pixmaps are shared, so identity means the image is unchanged
+        if pixmap is not self._shown["pixmap"]:
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+            else:
+                self.image_label.clear()
+            self._shown["pixmap"] = pixmap
+
+
+class VideoLabel(QLabel):
+    """
+    Shows camera frames without per-frame pixmap conversions.
+
+    Frames are resized straight into a persistent buffer of the size they
+    are shown at, wrapped once by a QImage that paintEvent draws directly.
+    The buffer and image are rebuilt only when the widget or frame size
+    changes.
+    """
+
+    # Qt 5.14+ reads BGR directly; older versions need the buffer converted to RGB
+    BGR_FORMAT = getattr(QImage, "Format_BGR888", None)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._buffer = None
+        self._image = None
+        self._layout_key = None
+        self._origin = None  # Top-left corner the image is centered at
+
+    def _allocate(self, frame_shape):
+        frame_h, frame_w = frame_shape[:2]
+        scale = min(self.width() / frame_w, self.height() / frame_h)
+        w, h = max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+        self._buffer = np.empty((h, w, 3), dtype=np.uint8)
+        image_format = self.BGR_FORMAT if self.BGR_FORMAT is not None else QImage.Format_RGB888
+        # Wraps the buffer without copying; the buffer must outlive the image
+        self._image = QImage(self._buffer.data, w, h, 3 * w, image_format)
+        self._origin = ((self.width() - w) // 2, (self.height() - h) // 2)
+
+    def show_frame(self, frame):
+        """Scale a BGR frame into the display buffer and schedule a repaint."""
+        key = (self.width(), self.height(), frame.shape)
+        if key != self._layout_key:
+            self._allocate(frame.shape)
+            self._layout_key = key
+        h, w = self._buffer.shape[:2]
+        interpolation = cv2.INTER_AREA if w < frame.shape[1] else cv2.INTER_LINEAR
+        cv2.resize(frame, (w, h), dst=self._buffer, interpolation=interpolation)
+        if self.BGR_FORMAT is None:
+            # In place, on the display-sized buffer rather than the full frame
+            cv2.cvtColor(self._buffer, cv2.COLOR_BGR2RGB, dst=self._buffer)
+        self.update()
+
+    def resizeEvent(self, event):
+        self._layout_key = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None:
+            return
+        painter = QPainter(self)
+        painter.drawImage(*self._origin, self._image)
+        painter.end()
 
 
 class PoseFrame(QFrame):
@@ -278,7 +380,7 @@ class PoseFrame(QFrame):
         video_layout = QVBoxLayout()
         video_layout.setContentsMargins(0, 0, 0, 0)
         
-        self.video_label = QLabel()
+        self.video_label = VideoLabel()
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_label.setMinimumSize(1000, 750)
@@ -298,47 +400,95 @@ class PoseFrame(QFrame):
         # -------------------------------
 # Helper Functions
 # -------------------------------
-def convert_frame_to_qpixmap(frame):
-    """Convert an OpenCV BGR frame to QPixmap."""
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    h, w, ch = frame_rgb.shape
-    bytes_per_line = ch * w
-    qt_image = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-    return QPixmap.fromImage(qt_image)
-
 def get_direction_feedback(user_landmarks, ref_landmarks):
     """Compare user's pose with reference pose and return feedback."""
-    all_feedback = []
-    for limb_type, sides in body_parts.items():
-        for side, landmarks in sides.items():
-            if all(lm in user_landmarks for lm in landmarks) and all(lm in ref_landmarks for lm in landmarks):
-                user_x = np.mean([user_landmarks[lm][0] for lm in landmarks])
-                user_y = np.mean([user_landmarks[lm][1] for lm in landmarks])
-                ref_x = np.mean([ref_landmarks[lm][0] for lm in landmarks])
-                ref_y = np.mean([ref_landmarks[lm][1] for lm in landmarks])
-                
-                diff_x = user_x - ref_x
-                diff_y = user_y - ref_y
-                
-                description = f"{side.lower()} {limb_type.lower()}"
-                if abs(diff_x) > x_threshold:
-                    direction = "left" if diff_x < 0 else "right"
-                    all_feedback.append({
-                        'part': description,
-                        'message': f"Move your {description} {direction}",
-                        'diff': abs(diff_x)
-                    })
-                if abs(diff_y) > y_threshold:
-                    direction = "up" if diff_y > 0 else "down"
-                    all_feedback.append({
-                        'part': description,
-                        'message': f"Move your {description} {direction}",
-                        'diff': abs(diff_y)
-                    })
-    if all_feedback:
-        all_feedback.sort(key=lambda x: x['diff'], reverse=True)
-        return all_feedback[0]['message']
-    return None
+    scores = score_poses(user_landmarks, ref_landmarks, x_threshold, y_threshold)
+    return scores.message(default=None)
+
+# -------------------------------
+# Capture & Pose Worker Thread
+# -------------------------------
+class PoseWorker(QThread):
+    """
+    Reads camera frames and runs pose detection off the GUI thread.
+
+    Only the newest result is kept: if the GUI hasn't taken the previous
+    frame yet it is replaced (and counted as dropped), so a slow UI never
+    builds up a backlog. frame_ready is emitted once per pickup.
+    """
+    frame_ready = pyqtSignal()
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.cap = open_frame_source(source)
+        self.pose_detector = create_pose_detector()
+        self.scheduler = InferenceScheduler()
+        self.roi = RoiCropper()
+        # Set from the GUI thread: run detection at all, and on every frame
+        self.detect = False
+        self.exact = False
+        self.dropped = 0
+        self._running = True
+        self._latest = None
+        self._lock = threading.Lock()
+
+    def detect_pose(self, frame, current_time):
+        """
+        Pose for the current frame, running inference only when the scheduler asks for it.
+
+        Returns:
+            tuple: (PoseLandmarks or None, True if this frame was inferred).
+        """
+        if not self.exact and not self.scheduler.should_infer(frame, current_time):
+            estimate = self.scheduler.estimate(current_time)
+            return (PoseLandmarks(estimate) if estimate is not None else None), False
+        started = time.perf_counter()
+        frame_rgb = self.roi.crop(frame)
+        if self.roi.moved:
+            # The tracker's region of interest is relative to the old crop
+            self.pose_detector.reset()
+        results = self.pose_detector.process(frame_rgb)
+        landmarks = None
+        if results.pose_landmarks:
+            landmarks = PoseLandmarks(self.roi.map_back(PoseLandmarks.from_mediapipe(results.pose_landmarks).data))
+        else:
+            self.roi.reset()
+        self.scheduler.record(landmarks.data if landmarks is not None else None,
+                              current_time, time.perf_counter() - started, frame)
+        return landmarks, True
+
+    def run(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.msleep(10)
+                continue
+            frame = cv2.flip(frame, 1)
+            current_time = time.time()
+            landmarks, inferred = None, False
+            if self.detect:
+                try:
+                    landmarks, inferred = self.detect_pose(frame, current_time)
+                except Exception as e:
+                    print(f"Error in pose detection: {e}")
+            with self._lock:
+                pending = self._latest is not None
+                if pending:
+                    self.dropped += 1
+                self._latest = (frame, landmarks, current_time, inferred)
+            if not pending:
+                self.frame_ready.emit()
+
+    def take_latest(self):
+        """Newest (frame, landmarks, time, inferred) result, or None if already taken."""
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+    def stop(self):
+        self._running = False
+        self.wait()
+        self.cap.release()
 
 # -------------------------------
 # Main Application Class
@@ -479,8 +629,8 @@ class YogaApp(QMainWindow):
         self.setCentralWidget(scroll)
 
     def initBackend(self):
-    # Initialize camera
-        self.cap = cv2.VideoCapture(0)
+    # Camera capture and pose detection run on a worker thread
+        self.worker = PoseWorker(KIOSK_SOURCE)
     
     # Initialize TTS manager
         self.tts_manager = TTSManager()
@@ -497,13 +647,24 @@ class YogaApp(QMainWindow):
             {"name": "Star", "file": "calibration/Cal_Star.png"},
             {"name": "Goddess", "file": "calibration/Cal_Goddess.png"}
         ]
+        self.tts_manager.warm_up(self.speech_vocabulary())
         self.calibration_initial_delay = 5
         self.baseline_capture_delay = 5
         self.calibration_post_delay = 5
         self.current_calibration_index = 0
-        self.baseline_landmarks = {}
         self.baseline_images = {}
         
+        # Load saved calibrations (importing a legacy landmarks.json only on request)
+        self.calibration_store = CalibrationStore()
+        if IMPORT_LANDMARKS and len(self.calibration_store) == 0:
+            try:
+                self.calibration_store.import_json(IMPORT_LANDMARKS, KIOSK_USER)
+            except Exception as e:
+                print(f"Could not import {IMPORT_LANDMARKS}:", e)
+        self.baseline_landmarks = self.calibration_store.poses(KIOSK_USER)
+        # Saves run here, in order, so file writes never block the GUI thread
+        self.store_executor = ThreadPoolExecutor(max_workers=1)
+        
         # Session settings
         self.session_countdown_duration = 10
         self.session_hold_duration = 5
@@ -512,14 +673,44 @@ class YogaApp(QMainWindow):
         self.latest_pose_time = None
         self.prev_feedback_time = 0
         self.feedback_interval = 2
+        self.smoother = LandmarkSmoother()
         
         # Initial reference image
         self.current_ref_image = None
         
-        # Start frame updates
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
+        # Overlay drawing with cached text sprites and reused buffers
+        self.compositor = OverlayCompositor()
+        
+        # Start frame updates; each worker result is painted on the GUI thread
+        self.worker.frame_ready.connect(self.update_frame)
+        self.worker.start()
+
+    def save_calibrations(self, poses):
+        """Persist calibrated poses; runs on store_executor."""
+        for name, landmarks in poses.items():
+            try:
+                self.calibration_store.put(KIOSK_USER, name, landmarks)
+            except Exception as e:
+                print(f"Could not save calibration for {name}:", e)
+
+    def speech_vocabulary(self):
+        """Every phrase the kiosk speaks; keep in step with the speak() calls below."""
+        phrases = [
+            "Welcome to A line if i. Get ready for your warm-up.",
+            "Warm-up complete. Press Start Session when you're ready.",
+            "Warm-up complete. Let's begin calibration.",
+            "Calibration complete. Press Start Session when you're ready.",
+            "Let's begin your yoga session!",
+            "Perfect! Hold this pose.",
+            "Congratulations! You've completed the A line if i Yoga routine!",
+            "Get ready for your guided yoga session!",
+            "Let's recalibrate your poses.",
+        ]
+        for pose in self.calibration_poses:
+            name = pose["name"]
+            phrases += [f"{name} calibrated.", f"Get ready for {name}.",
+                        f"Good job on {name}.", f"Next pose: {name}"]
+        return phrases + list(FEEDBACK_VOCABULARY)
 
     def start_workout(self):
         """Start the workout when welcome button is clicked"""
@@ -530,112 +721,43 @@ class YogaApp(QMainWindow):
 
     def create_welcome_overlay(self, overlay):
         """Create a professional welcome screen overlay with centered text and button"""
-        h, w = overlay.shape[:2]
-        
-        # Create dark overlay with higher opacity
-        overlay_layer = overlay.copy()
-        overlay_dark = np.zeros((h, w, 3), dtype=np.uint8)
-        overlay_dark.fill(0)  # Black background
-        alpha = 0.80  # 80% opacity for darker, more professional look
-        cv2.addWeighted(overlay_dark, alpha, overlay_layer, 1 - alpha, 0, overlay_layer)
-        
-        # Add main title "ALIGNIFY"
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        title = "ALIGNIFY"
-        font_scale = 5.0  # Larger text
-        thickness = 5
-        
-        # Get size of the text
-        (text_width, text_height), baseline = cv2.getTextSize(
-            title, font, font_scale, thickness)
-        
-        # Calculate center position
-        text_x = (w - text_width) // 2
-        text_y = (h - text_height) // 2 - 50  # Move text up to make room for button
-        
-        # Draw title with shadow effect
-        cv2.putText(overlay_layer, title, (text_x+3, text_y+3), font, font_scale,
-                    (50, 50, 50), thickness)  # Shadow
-        cv2.putText(overlay_layer, title, (text_x, text_y), font, font_scale,
-                    (255, 255, 255), thickness)  # Main text
-        
-        return overlay_layer
+        return self.compositor.welcome(overlay)
 
     def create_countdown_overlay(self, overlay, countdown_number):
         """Create a semi-transparent overlay with large countdown numbers in a modern font"""
-        h, w = overlay.shape[:2]
-        
-        # Create semi-transparent dark overlay
-        overlay_layer = overlay.copy()
-        overlay_dark = np.zeros((h, w, 3), dtype=np.uint8)
-        overlay_dark.fill(32)  # Very dark gray
-        alpha = 0.6  # Slightly more transparent
-        cv2.addWeighted(overlay_dark, alpha, overlay_layer, 1 - alpha, 0, overlay_layer)
-        
-        # Add large countdown number
-        font = cv2.FONT_HERSHEY_SIMPLEX  # Cleaner font
-        font_scale = 12.0  # Slightly smaller for better proportions
-        thickness = 20  # Thicker for better visibility
-        text_str = str(countdown_number)
-        
-        # Get size of the text
-        (text_width, text_height), baseline = cv2.getTextSize(
-            text_str, font, font_scale, thickness)
-        
-        # Calculate center position
-        text_x = (w - text_width) // 2
-        text_y = (h + text_height) // 2
-        
-        # Draw white text with black outline
-        # Bigger outline for better visibility
-        cv2.putText(overlay_layer, text_str, (text_x, text_y), font, font_scale,
-                    (0, 0, 0), thickness + 12)  # Thicker black outline
-        cv2.putText(overlay_layer, text_str, (text_x, text_y), font, font_scale,
-                    (255, 255, 255), thickness)  # White text
-        
-        return overlay_layer
+        return self.compositor.countdown(overlay, countdown_number)
 
     def update_frame(self):
         try:
-            ret, frame = self.cap.read()
-            if not ret:
+            latest = self.worker.take_latest()
+            if latest is None:
                 return
-                
-            frame = cv2.flip(frame, 1)
-            overlay = frame.copy()
-            current_time = time.time()
-            results = None
+            frame, landmarks, current_time, inferred = latest
+            # Only these phases use landmarks; calibration needs a real inference per frame
+            self.worker.detect = self.phase in ("calibration", "calibration_complete", "session")
+            self.worker.exact = self.phase == "calibration"
+            # Overlays are drawn on a reused canvas; frame stays clean for baseline snapshots
+            overlay = self.compositor.begin(frame)
             
             # Phase handling
-            # At the start of your phase handling in update_frame
-            # At the start of your phase handling in update_frame
             if self.phase == "initial":
-            # Show the welcome overlay
+                # Show the welcome overlay
                 overlay = self.create_welcome_overlay(overlay)
-            
-            # Still update the info panel but keep layout consistent
+                # Other phases set the panel themselves and keep it between updates
                 self.live_feed.info_panel.update_info(
-                title="Welcome to Alignify",
-                timer="",
-                instruction="Get ready for your guided yoga session",
-                image_path=None
-            )
-            
-            # Keep the Begin button visible and other buttons hidden
-            # self.welcome_button.setVisible(True)
+                    title="Welcome to Alignify",
+                    timer="",
+                    instruction="Get ready for your guided yoga session",
+                    image_path=None
+                )
+                self.status_label.setText("Status: Ready to begin")
+
+                # Keep the Begin button visible and other buttons hidden
                 self.start_button.setVisible(False)
                 self.recalibrate_button.setVisible(False)
             else:
-            # Hide welcome button in all other phases
+                # Hide welcome button in all other phases
                 self.live_feed.info_panel.begin_button.setVisible(False)
-                
-                # Info panel
-            self.live_feed.info_panel.update_info(
-                    title="Welcome",
-                    timer="",
-                    instruction="Get ready for your guided yoga session"
-                )
-            self.status_label.setText("Status: Ready to begin")
 
             if self.phase == "warmup":
                 remaining = int(self.warmup_duration - (current_time - self.phase_start_time))
@@ -647,9 +769,20 @@ class YogaApp(QMainWindow):
                 overlay = self.create_countdown_overlay(overlay, remaining)
                 self.status_label.setText("Status: Warm-up")
                 if remaining <= 0:
-                    self.phase = "calibration"
-                    self.phase_start_time = current_time
-                    self.tts_manager.speak("Warm-up complete. Let's begin calibration.")
+                    if all(p["name"] in self.baseline_landmarks for p in self.calibration_poses):
+                        # Every pose already has a saved calibration
+                        self.progress_bar.setValue(len(self.calibration_poses))
+                        self.status_label.setText("Status: Saved calibration loaded")
+                        self.start_button.setEnabled(True)
+                        self.recalibrate_button.setEnabled(True)
+                        self.start_button.setVisible(True)
+                        self.recalibrate_button.setVisible(True)
+                        self.tts_manager.speak("Warm-up complete. Press Start Session when you're ready.")
+                        self.phase = "calibration_complete"
+                    else:
+                        self.phase = "calibration"
+                        self.phase_start_time = current_time
+                        self.tts_manager.speak("Warm-up complete. Let's begin calibration.")
             
             elif self.phase == "calibration":
                 if self.current_calibration_index < len(self.calibration_poses):
@@ -674,25 +807,22 @@ class YogaApp(QMainWindow):
                         else:
                             remaining = int(self.baseline_capture_delay - (current_time - self.phase_start_time))
                         
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        results = pose_detector.process(frame_rgb)
-                        
-                        if results and results.pose_landmarks:
+                        if landmarks is not None:
                             mp_drawing.draw_landmarks(
                                 overlay,
-                                results.pose_landmarks,
+                                landmarks.to_mediapipe(),
                                 mp_pose.POSE_CONNECTIONS,
                                 landmark_drawing_spec,
                                 connection_drawing_spec
                             )
                             overlay = self.create_countdown_overlay(overlay, remaining)
                             
-                            if remaining <= 0:
-                                landmarks = {mp_pose.PoseLandmark(i).name: (lm.x, lm.y, lm.z)
-                                          for i, lm in enumerate(results.pose_landmarks.landmark)}
+                            # The baseline itself always comes from a fresh inference
+                            if remaining <= 0 and inferred:
                                 self.baseline_landmarks[pose_name] = landmarks
-                                self.baseline_images[pose_name] = frame.copy()
-                                self.current_ref_image = frame.copy()
+                                # Overlays go on the compositor canvas, so frame is still clean
+                                self.baseline_images[pose_name] = frame
+                                self.current_ref_image = frame
                                 self.tts_manager.speak(f"{pose_name} calibrated.")
                                 self.progress_bar.setValue(self.current_calibration_index + 1)
                                 self.phase = "calibration_delay"
@@ -708,6 +838,11 @@ class YogaApp(QMainWindow):
             
             elif self.phase == "calibration_delay":
                 remaining = int(self.calibration_post_delay - (current_time - self.phase_start_time))
+                self.live_feed.info_panel.update_info(
+                    title="Pose Captured",
+                    timer="",
+                    instruction="Get ready for the next pose"
+                )
                 self.status_label.setText("Status: Preparing next calibration pose")
                 if remaining <= 0:
                     self.current_calibration_index += 1
@@ -716,8 +851,7 @@ class YogaApp(QMainWindow):
                         self.phase = "calibration"
                         self.phase_start_time = current_time
                     else:
-                        with open('landmarks.json', 'w') as f:
-                            json.dump(self.baseline_landmarks, f)
+                        self.store_executor.submit(self.save_calibrations, dict(self.baseline_landmarks))
                         self.status_label.setText("Status: Calibration complete")
                         self.start_button.setEnabled(True)
                         self.recalibrate_button.setEnabled(True)
@@ -729,14 +863,17 @@ class YogaApp(QMainWindow):
 
             
             elif self.phase == "calibration_complete":
+                self.live_feed.info_panel.update_info(
+                    title="Calibration Complete",
+                    timer="",
+                    instruction="Press Start Session when you're ready"
+                )
                 # Just show the final calibration image without countdown
                 if self.current_ref_image is not None:
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = pose_detector.process(frame_rgb)
-                    if results and results.pose_landmarks:
+                    if landmarks is not None:
                         mp_drawing.draw_landmarks(
                             overlay,
-                            results.pose_landmarks,
+                            landmarks.to_mediapipe(),
                             mp_pose.POSE_CONNECTIONS,
                             landmark_drawing_spec,
                             connection_drawing_spec
@@ -761,19 +898,18 @@ class YogaApp(QMainWindow):
                     self.current_ref_image = self.baseline_images.get(first_pose, self.current_ref_image)
             
             elif self.phase == "session":
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = pose_detector.process(frame_rgb)
-                if results and results.pose_landmarks:
+                if landmarks is not None:
                     mp_drawing.draw_landmarks(
                         overlay,
-                        results.pose_landmarks,
+                        landmarks.to_mediapipe(),
                         mp_pose.POSE_CONNECTIONS,
                         landmark_drawing_spec,
                         connection_drawing_spec
                     )
                     current_pose = self.calibration_poses[self.current_pose_index]
-                    user_landmarks = {mp_pose.PoseLandmark(i).name: (lm.x, lm.y, lm.z)
-                                   for i, lm in enumerate(results.pose_landmarks.landmark)}
+                    user_landmarks = PoseLandmarks(
+                        self.smoother.update("camera", landmarks.data, current_time)
+                    )
                     ref_landmarks = self.baseline_landmarks.get(current_pose["name"])
                     feedback = None
                     if ref_landmarks:
@@ -841,33 +977,11 @@ class YogaApp(QMainWindow):
             
             # Add reference pose overlay if we have valid calibration data
             if self.current_ref_image is not None and self.baseline_landmarks:
-                ref_h, ref_w = self.current_ref_image.shape[:2]
-                scale_factor = 0.25
-                new_w = int(ref_w * scale_factor)
-                new_h = int(ref_h * scale_factor)
-                
-                ref_small = cv2.resize(self.current_ref_image, (new_w, new_h))
-                
                 # Position in bottom-right corner of video area
-                margin = 20
-                y_offset = overlay.shape[0] - new_h - margin
-                x_offset = overlay.shape[1] - new_w - margin
-                
-                # Add semi-transparent background
-                bg = np.zeros((new_h, new_w, 3), dtype=np.uint8)
-                bg.fill(255)
-                alpha = 0.8
-                ref_small = cv2.addWeighted(ref_small, alpha, bg, 1-alpha, 0)
-                
-                overlay[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = ref_small
+                self.compositor.thumbnail(overlay, self.current_ref_image)
             
             # Update video feed
-            live_pix = convert_frame_to_qpixmap(overlay)
-            self.live_feed.video_label.setPixmap(live_pix.scaled(
-                self.live_feed.video_label.size(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            ))
+            self.live_feed.video_label.show_frame(overlay)
         
         except Exception as e:
             print(f"Error in update_frame: {e}")
@@ -896,7 +1010,8 @@ class YogaApp(QMainWindow):
     
     def closeEvent(self, event):
         """Clean up resources when closing the application."""
-        self.cap.release()
+        self.worker.stop()
+        self.store_executor.shutdown(wait=True)  # Finish pending calibration saves
         event.accept()
 
 # -------------------------------
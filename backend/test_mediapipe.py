@@ -1,7 +1,16 @@
+import sys
 import cv2
 import mediapipe as mp
 import time
 
+from frame_sources import open_frame_source
+
+# Usage: python test_mediapipe.py [source] [--headless]
+# The source defaults to the webcam; a video file or image directory also works.
+args = [arg for arg in sys.argv[1:] if arg != "--headless"]
+headless = "--headless" in sys.argv[1:]
+source = args[0] if args else 0
+
 print("Testing MediaPipe installation...")
 
 # Initialize MediaPipe Pose
@@ -15,14 +24,15 @@ pose = mp_pose.Pose(
 
 print("MediaPipe Pose initialized")
 
-# Open webcam
-cap = cv2.VideoCapture(0)
+# Open the frame source
+cap = open_frame_source(source)
 if not cap.isOpened():
-    print("Error: Could not open webcam")
+    print(f"Error: Could not open frame source {source}")
     exit()
 
-print("Webcam opened successfully")
-print("Press 'q' to exit test")
+print(f"Frame source {source} opened successfully")
+if not headless:
+    print("Press 'q' to exit test")
 
 # Test for a few frames
 start_time = time.time()
@@ -56,12 +66,13 @@ try:
                 mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=1)
             )
         
-        # Display the image with landmarks
-        cv2.imshow('MediaPipe Pose Test', image)
-        
-        # Exit if 'q' is pressed
-        if cv2.waitKey(5) & 0xFF == ord('q'):
-            break
+        if not headless:
+            # Display the image with landmarks
+            cv2.imshow('MediaPipe Pose Test', image)
+            
+            # Exit if 'q' is pressed
+            if cv2.waitKey(5) & 0xFF == ord('q'):
+                break
         
         frame_count += 1
 except Exception as e:
@@ -69,7 +80,8 @@ except Exception as e:
 finally:
     # Release resources
     cap.release()
-    cv2.destroyAllWindows()
+    if not headless:
+        cv2.destroyAllWindows()
     pose.close()
 
     print(f"Test completed")
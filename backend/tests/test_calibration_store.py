@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from calibration_store import HEADER_DTYPE, RECORD_DTYPE, CalibrationStore
+from pose_landmarks import LANDMARK_SHAPE, PoseLandmarks
+
+
+def pose(value):
+    return PoseLandmarks(np.full(LANDMARK_SHAPE, value, dtype=np.float32))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "calibration_store.bin")
+
+
+def test_reload_keeps_latest_versions(path):
+    store = CalibrationStore(path)
+    assert store.put("alice", "Tree", pose(0.1)) == 1
+    assert store.put("alice", "Warrior", pose(0.2)) == 1
+    assert store.put("alice", "Tree", pose(0.3)) == 2
+    assert store.put("bob", "Tree", pose(0.4)) == 1
+
+    reloaded = CalibrationStore(path)
+    assert len(reloaded) == 3
+    assert reloaded.get_version("alice", "Tree") == 2
+    np.testing.assert_array_equal(reloaded.get("alice", "Tree").data, pose(0.3).data)
+    assert set(reloaded.poses("alice")) == {"Tree", "Warrior"}
+    assert reloaded.get("carol", "Tree") is None
+    assert len(reloaded.records) == 4
+
+
+def test_reads_after_put_see_new_records(path):
+    store = CalibrationStore(path)
+    store.put("alice", "Tree", pose(0.1))
+    assert store.get("alice", "Tree") is not None
+    store.put("alice", "Warrior", pose(0.2))
+    np.testing.assert_array_equal(store.get("alice", "Warrior").data, pose(0.2).data)
+
+
+def test_torn_record_is_dropped(path):
+    store = CalibrationStore(path)
+    store.put("alice", "Tree", pose(0.1))
+    store.put("alice", "Warrior", pose(0.2))
+    # Simulate a crash halfway through writing the second record
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_DTYPE.itemsize + RECORD_DTYPE.itemsize + RECORD_DTYPE.itemsize // 2)
+
+    reloaded = CalibrationStore(path)
+    assert set(reloaded.poses("alice")) == {"Tree"}
+    assert os.path.getsize(path) == HEADER_DTYPE.itemsize + RECORD_DTYPE.itemsize
+
+    # Appends stay aligned after the repair
+    reloaded.put("alice", "Chair", pose(0.5))
+    again = CalibrationStore(path)
+    assert set(again.poses("alice")) == {"Tree", "Chair"}
+    np.testing.assert_array_equal(again.get("alice", "Chair").data, pose(0.5).data)
+
+
+def test_rejects_bad_names_and_files(path, tmp_path):
+    store = CalibrationStore(path)
+    with pytest.raises(ValueError):
+        store.put("", "Tree", pose(0.1))
+    with pytest.raises(ValueError):
+        store.put("alice", "x" * 33, pose(0.1))
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a store, just some bytes")
+    with pytest.raises(ValueError):
+        CalibrationStore(str(other))
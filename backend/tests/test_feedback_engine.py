@@ -0,0 +1,82 @@
+import numpy as np
+
+from feedback_engine import FEEDBACK_VOCABULARY, GOOD_ALIGNMENT_MESSAGE, score_poses
+from pose_landmarks import LANDMARK_INDEX, LANDMARK_SHAPE, PoseLandmarks
+
+# The per-limb comparison the servers used before score_poses, kept here
+# as the reference behaviour
+BODY_PARTS = {
+    "ARM": {
+        "RIGHT": ["LEFT_WRIST", "LEFT_ELBOW", "LEFT_SHOULDER"],
+        "LEFT": ["RIGHT_WRIST", "RIGHT_ELBOW", "RIGHT_SHOULDER"],
+    },
+    "LEG": {
+        "RIGHT": ["LEFT_ANKLE", "LEFT_KNEE", "LEFT_HIP"],
+        "LEFT": ["RIGHT_ANKLE", "RIGHT_KNEE", "RIGHT_HIP"],
+    },
+}
+
+
+def baseline_feedback(user, ref, x_threshold=0.1, y_threshold=0.1):
+    all_feedback = []
+    for limb_type, sides in BODY_PARTS.items():
+        for side, names in sides.items():
+            rows = [LANDMARK_INDEX[name] for name in names]
+            diff_x = np.mean(user[rows, 0]) - np.mean(ref[rows, 0])
+            diff_y = np.mean(user[rows, 1]) - np.mean(ref[rows, 1])
+            description = f"{side.lower()} {limb_type.lower()}"
+            if abs(diff_x) > x_threshold:
+                direction = "left" if diff_x < 0 else "right"
+                all_feedback.append((abs(diff_x), f"Move your {description} {direction}"))
+            if abs(diff_y) > y_threshold:
+                direction = "up" if diff_y > 0 else "down"
+                all_feedback.append((abs(diff_y), f"Move your {description} {direction}"))
+    if all_feedback:
+        all_feedback.sort(key=lambda item: item[0], reverse=True)
+        return all_feedback[0][1]
+    return GOOD_ALIGNMENT_MESSAGE
+
+
+def random_poses(rng, count):
+    poses = rng.uniform(0.2, 0.8, size=(count,) + LANDMARK_SHAPE).astype(np.float32)
+    poses[..., 3] = 1.0
+    return poses
+
+
+def test_message_matches_baseline():
+    rng = np.random.default_rng(0)
+    refs = random_poses(rng, 200)
+    # Small and large offsets, so both aligned and misaligned pairs occur
+    users = refs + rng.normal(0, 0.08, size=refs.shape).astype(np.float32)
+    for user, ref in zip(users, refs):
+        expected = baseline_feedback(user.astype(np.float64), ref.astype(np.float64))
+        assert score_poses(user, ref).message() == expected
+
+
+def test_batch_matches_pairwise():
+    rng = np.random.default_rng(1)
+    users = random_poses(rng, 5)
+    refs = random_poses(rng, 4)
+    scores = score_poses(users, refs)
+    assert scores.accuracy.shape == (5, 4)
+    for n in range(5):
+        for m in range(4):
+            assert scores.message(n, m) == score_poses(users[n], refs[m]).message()
+            assert scores.accuracy[n, m] == score_poses(users[n], refs[m]).accuracy[0, 0]
+
+
+def test_identical_pose_is_aligned():
+    pose = PoseLandmarks(random_poses(np.random.default_rng(2), 1)[0])
+    scores = score_poses(pose, pose)
+    assert scores.message() == GOOD_ALIGNMENT_MESSAGE
+    assert scores.ranked() == []
+    assert scores.accuracy[0, 0] == 100
+
+
+def test_ranked_cues_come_from_vocabulary():
+    rng = np.random.default_rng(3)
+    user, ref = random_poses(rng, 2)
+    ranked = score_poses(user, ref).ranked()
+    assert ranked
+    assert set(ranked) <= set(FEEDBACK_VOCABULARY)
+    assert ranked[0] == baseline_feedback(user.astype(np.float64), ref.astype(np.float64))
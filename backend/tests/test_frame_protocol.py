@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+import pytest
+
+from frame_protocol import (
+    CODEC_JPEG, CODEC_RGB, CODEC_RGBA, FRAME_HEADER_SIZE, FrameProtocolError,
+    decode_frame_rgb, pack_frame, parse_frame_header
+)
+
+
+def gradient(height=48, width=64):
+    ys, xs = np.mgrid[0:height, 0:width]
+    return np.dstack([xs * 4, ys * 5, (xs + ys) * 2]).astype(np.uint8)
+
+
+def test_header_round_trip():
+    message = pack_frame(7, 1234.5, CODEC_RGB, 64, 48, b"")
+    assert len(message) == FRAME_HEADER_SIZE
+    header = parse_frame_header(message)
+    assert (header.frame_id, header.timestamp, header.codec, header.width, header.height) == \
+        (7, 1234.5, CODEC_RGB, 64, 48)
+
+
+def test_rgb_round_trip():
+    image = gradient()
+    header, decoded = decode_frame_rgb(pack_frame(1, 0.0, CODEC_RGB, 64, 48, image.tobytes()))
+    assert header.frame_id == 1
+    np.testing.assert_array_equal(decoded, image)
+
+
+def test_rgba_drops_alpha():
+    image = gradient()
+    rgba = np.dstack([image, np.full(image.shape[:2], 200, np.uint8)])
+    _, decoded = decode_frame_rgb(pack_frame(2, 0.0, CODEC_RGBA, 64, 48, rgba.tobytes()))
+    np.testing.assert_array_equal(decoded, image)
+
+
+def test_jpeg_decodes_to_rgb():
+    image = gradient()
+    ok, jpeg = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    # Works from a memoryview, like a WebSocket receive buffer
+    message = memoryview(pack_frame(3, 16.7, CODEC_JPEG, 0, 0, jpeg.tobytes()))
+    header, decoded = decode_frame_rgb(message)
+    assert header.codec == CODEC_JPEG
+    assert decoded.shape == image.shape
+    assert np.abs(decoded.astype(int) - image).mean() < 3
+
+
+def test_malformed_messages():
+    with pytest.raises(FrameProtocolError):
+        parse_frame_header(b"\x00" * (FRAME_HEADER_SIZE - 1))
+    with pytest.raises(FrameProtocolError):
+        parse_frame_header(pack_frame(1, 0.0, 99, 0, 0, b""))
+    with pytest.raises(FrameProtocolError):
+        decode_frame_rgb(pack_frame(1, 0.0, CODEC_RGB, 64, 48, b"\x00" * 10))
+    with pytest.raises(FrameProtocolError):
+        decode_frame_rgb(pack_frame(1, 0.0, CODEC_JPEG, 0, 0, b"not a jpeg"))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from pose_landmarks import LANDMARK_SHAPE
+from roi import RoiCropper
+
+WIDTH, HEIGHT = 640, 480
+
+
+def person(x0, y0, x1, y1):
+    """Landmarks spread over a box in normalized frame coordinates."""
+    landmarks = np.zeros(LANDMARK_SHAPE, dtype=np.float32)
+    landmarks[:, 0] = np.linspace(x0, x1, len(landmarks))
+    landmarks[:, 1] = np.linspace(y0, y1, len(landmarks))
+    landmarks[:, 2] = 0.1
+    landmarks[:, 3] = 1.0
+    return landmarks
+
+
+def test_full_frame_map_back_is_identity():
+    cropper = RoiCropper(enabled=False)
+    cropper.crop(np.zeros((HEIGHT, WIDTH, 3), np.uint8))
+    landmarks = person(0.4, 0.3, 0.6, 0.7)
+    np.testing.assert_allclose(cropper.map_back(landmarks), landmarks, atol=1e-6)
+    assert cropper.box is None
+
+
+def test_map_back_from_crop():
+    cropper = RoiCropper(roi_size=128)
+    frame = np.zeros((HEIGHT, WIDTH, 3), np.uint8)
+    cropper.crop(frame)
+    cropper.map_back(person(0.4, 0.3, 0.6, 0.7))
+    assert cropper.box is not None
+
+    model_input = cropper.crop(frame)
+    x0, y0, w, h = cropper.region
+    assert (x0, y0, w, h) == cropper.box
+    assert max(model_input.shape[:2]) == 128
+
+    # Crop corners and centre land on the region's corners and centre
+    crop_landmarks = np.zeros(LANDMARK_SHAPE, dtype=np.float32)
+    crop_landmarks[:3, :2] = [(0.0, 0.0), (1.0, 1.0), (0.5, 0.5)]
+    crop_landmarks[:, 2] = 0.2
+    mapped = cropper.map_back(crop_landmarks)
+    np.testing.assert_allclose(mapped[0, :2], (x0 / WIDTH, y0 / HEIGHT), atol=1e-6)
+    np.testing.assert_allclose(mapped[1, :2], ((x0 + w) / WIDTH, (y0 + h) / HEIGHT), atol=1e-6)
+    np.testing.assert_allclose(mapped[2, :2], ((x0 + w / 2) / WIDTH, (y0 + h / 2) / HEIGHT), atol=1e-6)
+    # z is relative to the input width, so it shrinks with the crop
+    assert mapped[0, 2] == pytest.approx(0.2 * w / WIDTH)
+
+
+def test_region_holds_still_for_small_moves():
+    cropper = RoiCropper()
+    frame = np.zeros((HEIGHT, WIDTH, 3), np.uint8)
+    cropper.crop(frame)
+    cropper.map_back(person(0.4, 0.3, 0.6, 0.7))
+    cropper.crop(frame)
+    region = cropper.region
+    # Map a slightly shifted pose back through the crop and crop again
+    x0, y0, w, h = region
+    shifted = person(0.4, 0.3, 0.6, 0.7)
+    shifted[:, 0] = (shifted[:, 0] * WIDTH + 2 - x0) / w
+    shifted[:, 1] = (shifted[:, 1] * HEIGHT - y0) / h
+    cropper.map_back(shifted)
+    cropper.crop(frame)
+    assert cropper.region == region
+    assert not cropper.moved
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# "elevenlabs" synthesizes with ElevenLabs and falls back to the local
+# engine when it can't be reached; "local" only uses the local engine
+# (offline kiosks and tests)
+TTS_ENGINE = os.getenv("ALIGNIFY_TTS", "elevenlabs")
+
+# Synthesized phrases are stored here, keyed by text and voice settings
+TTS_CACHE_DIR = os.getenv("ALIGNIFY_TTS_CACHE", "tts_cache")
+
+# Phrases kept on disk; the least recently used are deleted past this. The
+# kiosk's whole vocabulary is well under it, so only stale phrases go.
+TTS_CACHE_ENTRIES = int(os.getenv("ALIGNIFY_TTS_CACHE_ENTRIES", "512"))
+
+VOICE_SETTINGS = {"stability": 0.75, "similarity_boost": 0.75}
+
+# Seconds to use the fallback before trying a failed synthesizer again
+RETRY_AFTER = 60.0
+
+
+def cache_key(text, voice):
+    """Stable key for a phrase spoken with a voice description dict."""
+    blob = json.dumps({"text": text, "voice": voice}, sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Synthesized audio on disk, one file per phrase, bounded to max_entries.
+
+    The cached files are tracked in memory in least-recently-used order,
+    so repeated cues skip the filesystem and the oldest files are deleted
+    once the cache is full; playback only needs the file path.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_entries=TTS_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # Key -> path, least recently used first
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Files from earlier runs, oldest first; leftover .tmp files are partial writes
+        existing = []
+        for entry in os.scandir(directory):
+            key, suffix = os.path.splitext(entry.name)
+            if entry.is_file() and suffix != ".tmp":
+                existing.append((entry.stat().st_mtime, key, entry.path))
+        with self._lock:
+            for _, key, path in sorted(existing):
+                self._entries[key] = path
+            self._evict()
+
+    def path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            key, path = self._entries.popitem(last=False)
+            try:
+                os.remove(path)
+            except OSError as e:
+                # Already gone, or still open for playback on Windows
+                logger.debug(f"Could not remove cached audio {path}: {e}")
+
+    def put(self, key, suffix, audio):
+        # Write then rename, so a crash never leaves a truncated entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        path = self.path(key, suffix)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._entries[key] = path
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def file(self, key, suffix):
+        """Path of the cached audio file for key, or None if it isn't cached."""
+        path = self.path(key, suffix)
+        with self._lock:
+            if self._entries.get(key) == path:
+                self._entries.move_to_end(key)
+                return path
+        # Written by another process sharing the directory
+        if os.path.exists(path):
+            with self._lock:
+                self._entries[key] = path
+                self._entries.move_to_end(key)
+                self._evict()
+            return path
+        return None
+
+
+class ElevenLabsSynthesizer:
+    suffix = ".mp3"
+
+    def __init__(self, api_key, voice_id, voice_settings=VOICE_SETTINGS, timeout=10):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.voice_settings = dict(voice_settings)
+        self.timeout = timeout
+        self.voice = {"engine": "elevenlabs", "voice_id": voice_id, "settings": self.voice_settings}
+
+    def synthesize(self, text):
+        response = requests.post(
+            f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}",
+            headers={
+                "Accept": "audio/mpeg",
+                "Content-Type": "application/json",
+                "xi-api-key": self.api_key
+            },
+            json={"text": text, "voice_settings": self.voice_settings},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"ElevenLabs TTS error {response.status_code}: {response.text[:200]}")
+        return response.content
+
+
+class LocalSynthesizer:
+    """
+    Offline speech with pyttsx3 (SAPI5, NSSpeechSynthesizer or eSpeak).
+
+    The SAPI5 and NSSpeechSynthesizer drivers must stay on the thread that
+    created them, so the engine lives on one dedicated thread and every
+    synthesis runs there.
+    """
+
+    suffix = ".wav"
+
+    def __init__(self, rate=170):
+        self.rate = rate
+        self.voice = {"engine": "pyttsx3", "rate": rate}
+        self._engine = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyttsx3")
+
+    def synthesize(self, text):
+        return self._executor.submit(self._synthesize, text).result()
+
+    def _synthesize(self, text):
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+        fd, path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        try:
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+            with open(path, "rb") as f:
+                audio = f.read()
+        finally:
+            os.remove(path)
+        if not audio:
+            raise RuntimeError("Local TTS produced no audio")
+        return audio
+
+
+class SpeechCache:
+    """
+    Cached phrase synthesis over an ordered list of synthesizers.
+
+    Each phrase is looked up, then synthesized, with the first synthesizer
+    and only falls through to the next one if that fails, so a phrase
+    cached in the preferred voice is always used when available.
+    """
+
+    def __init__(self, synthesizers, cache=None):
+        self.synthesizers = list(synthesizers)
+        self.cache = cache or AudioCache()
+        self._retry_at = {}
+        self._locks = {}  # Cache key -> lock held while that phrase is synthesized
+        self._locks_guard = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def audio_file(self, text):
+        """Path of an audio file speaking text, synthesizing it if needed; None if every synthesizer fails."""
+        for synthesizer in self.synthesizers:
+            key = cache_key(text, synthesizer.voice)
+            path = self.cache.file(key, synthesizer.suffix)
+            if path is not None:
+                return path
+            if time.monotonic() < self._retry_at.get(id(synthesizer), 0):
+                continue
+            # Per phrase, so a live cue never waits behind the warm-up
+            # synthesizing some other phrase
+            with self._key_lock(key):
+                # Another thread may have synthesized it while we waited
+                path = self.cache.file(key, synthesizer.suffix)
+                if path is not None:
+                    return path
+                try:
+                    audio = synthesizer.synthesize(text)
+                except Exception as e:
+                    logger.warning(f"{synthesizer.voice['engine']} TTS failed for {text!r}: {e}")
+                    self._retry_at[id(synthesizer)] = time.monotonic() + RETRY_AFTER
+                    continue
+                self.cache.put(key, synthesizer.suffix, audio)
+                return self.cache.path(key, synthesizer.suffix)
+        return None
+
+    def warm_up(self, phrases):
+        """Synthesize every phrase that isn't cached yet. Returns how many are available."""
+        started = time.perf_counter()
+        available = sum(self.audio_file(text) is not None for text in dict.fromkeys(phrases))
+        logger.info(f"TTS warm-up: {available} phrases ready in {time.perf_counter() - started:.1f}s")
+        return available
+
+
+def create_speech_cache(api_key=None, voice_id=None, engine=TTS_ENGINE):
+    synthesizers = []
+    if engine == "elevenlabs" and api_key:
+        synthesizers.append(ElevenLabsSynthesizer(api_key, voice_id))
+    elif engine not in ("elevenlabs", "local"):
+        raise ValueError(f"Unknown TTS engine {engine!r}; use 'elevenlabs' or 'local'")
+    synthesizers.append(LocalSynthesizer())
+    return SpeechCache(synthesizers)
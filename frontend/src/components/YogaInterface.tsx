@@ -14,6 +14,25 @@ interface PoseData {
   type: string
   landmarks?: { [key: string]: Landmark }
   timestamp: string
+  frame_id?: number
+  client_timestamp?: number
+}
+
+// Binary frame header, see backend/frame_protocol.py:
+// uint32 frame_id, float64 timestamp, uint8 codec, uint8 reserved, uint16 width, uint16 height
+const FRAME_HEADER_SIZE = 18
+const CODEC_JPEG = 1
+
+const packFrame = (frameId: number, width: number, height: number, jpeg: ArrayBuffer) => {
+  const message = new Uint8Array(FRAME_HEADER_SIZE + jpeg.byteLength)
+  const header = new DataView(message.buffer)
+  header.setUint32(0, frameId, true)
+  header.setFloat64(4, performance.now(), true)
+  header.setUint8(12, CODEC_JPEG)
+  header.setUint16(14, width, true)
+  header.setUint16(16, height, true)
+  message.set(new Uint8Array(jpeg), FRAME_HEADER_SIZE)
+  return message.buffer
 }
 
 const POSES = [
@@ -30,6 +49,7 @@ export default function YogaInterface() {
   const [currentPose, setCurrentPose] = useState(0)
   const [phase, setPhase] = useState<'welcome' | 'calibration' | 'session'>('welcome')
   const [feedback, setFeedback] = useState('')
+  const frameIdRef = useRef(0)
 
   const { sendMessage, lastMessage } = useWebSocket('ws://localhost:8000/ws/pose', {
     shouldReconnect: () => true,
@@ -83,13 +103,17 @@ export default function YogaInterface() {
       // Draw video frame to canvas
       context.drawImage(video, 0, 0, canvas.width, canvas.height)
 
-      // Convert canvas to base64
-      const imageData = canvas.toDataURL('image/jpeg', 0.5)
-      
-      // Send to backend
-      sendMessage(JSON.stringify({ image: imageData }))
-
-      requestAnimationFrame(detectPose)
+      // Encode the frame as JPEG and send it as a binary message
+      const width = canvas.width
+      const height = canvas.height
+      canvas.toBlob(async (blob) => {
+        if (blob) {
+          const jpeg = await blob.arrayBuffer()
+          frameIdRef.current = (frameIdRef.current + 1) >>> 0
+          sendMessage(packFrame(frameIdRef.current, width, height, jpeg))
+        }
+        requestAnimationFrame(detectPose)
+      }, 'image/jpeg', 0.5)
     }
 
     requestAnimationFrame(detectPose)